@@ -27,6 +27,7 @@ INSTALLED_APPS = [
     'django.contrib.sites',
     'django.contrib.admin',
     'rest_framework',
+    'django_filters',
     'drf_spectacular',
     'rest_framework_simplejwt.token_blacklist',
 
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -79,6 +81,14 @@ DATABASES = {
         'HOST': os.environ.get('POSTGRES_HOST'),
         # Use 'db' in Docker, 'localhost' otherwise
         'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        # Keep connections open across requests (seconds; 0 closes them after
+        # every request) and check them before reuse, so a dropped connection
+        # is replaced instead of failing the request
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+        },
     },
 }
 
@@ -195,3 +205,144 @@ MODEL_NAME_AI = "gpt-4o-mini"  # Назва моделі OpenAI
 
 # YouTube settings
 YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
+
+# Insight pipeline concurrency
+PIPELINE_MAX_WORKERS = int(os.getenv('PIPELINE_MAX_WORKERS', 8))
+PIPELINE_TRANSCRIPT_CONCURRENCY = int(os.getenv('PIPELINE_TRANSCRIPT_CONCURRENCY', 8))
+PIPELINE_LLM_CONCURRENCY = int(os.getenv('PIPELINE_LLM_CONCURRENCY', 4))
+
+# Pooled HTTP connections for the async clients
+ASYNC_HTTP_TIMEOUT = float(os.getenv('ASYNC_HTTP_TIMEOUT', 30))
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv('ASYNC_HTTP_MAX_CONNECTIONS', 100))
+ASYNC_HTTP_MAX_KEEPALIVE = int(os.getenv('ASYNC_HTTP_MAX_KEEPALIVE', 20))
+
+# API clients are built once per process (see api/clients.py). Timeouts in
+# seconds; PREWARM_CLIENTS builds them while the app loads instead of on the
+# first request
+YOUTUBE_HTTP_TIMEOUT = float(os.getenv('YOUTUBE_HTTP_TIMEOUT', 15))
+# Base URL of the YouTube Data API; point it at a local stand-in server for benchmarks
+YOUTUBE_API_ENDPOINT = os.getenv('YOUTUBE_API_ENDPOINT', '')
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', 60))
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', 2))
+PREWARM_CLIENTS = os.getenv('PREWARM_CLIENTS', 'False').lower() == 'true'
+
+# Stored channel statistics are refetched once older than this (seconds)
+CHANNEL_STATS_TTL = int(os.getenv('CHANNEL_STATS_TTL', 24 * 60 * 60))
+
+# Most results (each one an LLM insight) a single search may return
+SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', 50))
+
+# Candidate scanning: how many search results a single search may page through
+# (also bounded by what the quota bucket can admit at once, see
+# api.quota.max_candidates), and how many 50-id stats chunks may be in flight
+# at once
+SEARCH_MAX_CANDIDATES = int(os.getenv('SEARCH_MAX_CANDIDATES', 1000))
+YOUTUBE_STATS_CONCURRENCY = int(os.getenv('YOUTUBE_STATS_CONCURRENCY', 4))
+
+# Default ranking formula (see api/scoring.py), and the priors used by the
+# smoothed formulas
+SCORING_FORMULA = os.getenv('SCORING_FORMULA', 'ratio')
+SCORING_PRIOR_SUBS = int(os.getenv('SCORING_PRIOR_SUBS', 1000))
+SCORING_PRIOR_VIEWS = int(os.getenv('SCORING_PRIOR_VIEWS', 100))
+
+# YouTube Data API quota: daily budget in units, and a token bucket that spreads
+# it across the day. A search reserves its whole cost (102 units per 50
+# candidates) up front, so the capacity is also the largest search admitted;
+# searches that would wait longer than YOUTUBE_QUOTA_MAX_WAIT seconds for
+# tokens are rejected. Each worker process has its own bucket and cannot see
+# the others' searches in flight, so leave one bucket per process of headroom
+# below the real project quota.
+YOUTUBE_DAILY_QUOTA = int(os.getenv('YOUTUBE_DAILY_QUOTA', 10000))
+YOUTUBE_QUOTA_BUCKET_CAPACITY = int(os.getenv('YOUTUBE_QUOTA_BUCKET_CAPACITY', 2500))
+YOUTUBE_QUOTA_MAX_WAIT = float(os.getenv('YOUTUBE_QUOTA_MAX_WAIT', 5))
+YOUTUBE_QUOTA_TIMEZONE = 'America/Los_Angeles'
+
+# Worker processes that run background search jobs. A running job touches its
+# row every SEARCH_JOB_LEASE_SECONDS / 3; run_search_jobs requeues running jobs
+# silent for longer than the lease (their worker died).
+SEARCH_JOB_WORKERS = int(os.getenv('SEARCH_JOB_WORKERS', 2))
+SEARCH_JOB_LEASE_SECONDS = int(os.getenv('SEARCH_JOB_LEASE_SECONDS', 300))
+
+# Search response cache. SEARCH_CACHE_BACKEND picks where it lives: 'locmem',
+# 'file' or 'db' (the latter needs `python manage.py createcachetable`).
+SEARCH_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'search-responses',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('SEARCH_CACHE_LOCATION', BASE_DIR / '.cache' / 'search'),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'search_response_cache',
+    },
+}
+SEARCH_CACHE_ALIAS = 'search'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    SEARCH_CACHE_ALIAS: SEARCH_CACHE_BACKENDS[os.getenv('SEARCH_CACHE_BACKEND', 'locmem')],
+}
+# Seconds a cached search is fresh, then how long it may still be served stale
+# while a background refresh runs
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', 10 * 60))
+SEARCH_CACHE_STALE_TTL = int(os.getenv('SEARCH_CACHE_STALE_TTL', 60 * 60))
+SEARCH_CACHE_REFRESH_TIMEOUT = int(os.getenv('SEARCH_CACHE_REFRESH_TIMEOUT', 15 * 60))
+
+# Batched insight generation: pack several videos into one chat completion
+INSIGHT_BATCH_MODE = os.getenv('INSIGHT_BATCH_MODE', 'False').lower() == 'true'
+INSIGHT_BATCH_MAX_VIDEOS = int(os.getenv('INSIGHT_BATCH_MAX_VIDEOS', 10))
+INSIGHT_BATCH_TOKEN_BUDGET = int(os.getenv('INSIGHT_BATCH_TOKEN_BUDGET', 6000))
+
+# Transcripts: preferred languages in order, and how long (seconds) a video
+# without a transcript is left alone before it is tried again
+TRANSCRIPT_LANGUAGES = [lang.strip() for lang in os.getenv('TRANSCRIPT_LANGUAGES', 'en').split(',')]
+TRANSCRIPT_RETRY_AFTER = int(os.getenv('TRANSCRIPT_RETRY_AFTER', 7 * 24 * 60 * 60))
+
+# Prompt budgets (tokens). Transcripts over budget are summarized chunk by
+# chunk with the cheaper summary model, reading at most INSIGHT_SUMMARY_MAX_CHUNKS chunks
+INSIGHT_DESCRIPTION_TOKEN_BUDGET = int(os.getenv('INSIGHT_DESCRIPTION_TOKEN_BUDGET', 500))
+INSIGHT_TRANSCRIPT_TOKEN_BUDGET = int(os.getenv('INSIGHT_TRANSCRIPT_TOKEN_BUDGET', 3000))
+INSIGHT_SUMMARY_MODEL = os.getenv('INSIGHT_SUMMARY_MODEL', 'gpt-4o-mini')
+INSIGHT_SUMMARY_CHUNK_TOKENS = int(os.getenv('INSIGHT_SUMMARY_CHUNK_TOKENS', 4000))
+INSIGHT_SUMMARY_MAX_CHUNKS = int(os.getenv('INSIGHT_SUMMARY_MAX_CHUNKS', 8))
+
+# Stat snapshots: (max video age in days, refresh interval in hours) tiers,
+# youngest first; the last tier (max age None) covers every older video.
+# Velocity is measured over the last SNAPSHOT_VELOCITY_WINDOW days
+SNAPSHOT_REFRESH_TIERS = [(1, 1), (7, 6), (30, 24), (None, 24 * 7)]
+SNAPSHOT_VELOCITY_WINDOW = int(os.getenv('SNAPSHOT_VELOCITY_WINDOW', 7))
+
+# Full-text search over stored insights: Postgres text search configuration,
+# and how much of each transcript is indexed
+FULLTEXT_CONFIG = os.getenv('FULLTEXT_CONFIG', 'english')
+FULLTEXT_TRANSCRIPT_CHARS = int(os.getenv('FULLTEXT_TRANSCRIPT_CHARS', 100_000))
+
+# Near-duplicate grouping before insight generation: members of a group share
+# their leader's insight. Thresholds are estimated Jaccard similarities of the
+# title and of the description plus the start of a stored transcript
+INSIGHT_DEDUP = os.getenv('INSIGHT_DEDUP', 'True').lower() == 'true'
+INSIGHT_DEDUP_TITLE_THRESHOLD = float(os.getenv('INSIGHT_DEDUP_TITLE_THRESHOLD', 0.6))
+INSIGHT_DEDUP_BODY_THRESHOLD = float(os.getenv('INSIGHT_DEDUP_BODY_THRESHOLD', 0.8))
+INSIGHT_DEDUP_TRANSCRIPT_CHARS = int(os.getenv('INSIGHT_DEDUP_TRANSCRIPT_CHARS', 5000))
+
+# Bulk export (see api/export.py): rows fetched per database round-trip and
+# written per CSV chunk, and rows per Parquet row group
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
+EXPORT_PARQUET_ROW_GROUP = int(os.getenv('EXPORT_PARQUET_ROW_GROUP', 20000))
+
+# Watchlists (see api/watchlists.py): shortest allowed crawl interval, how far
+# back a first crawl looks, how much each crawl overlaps the previous one to
+# catch late-indexed videos, and the delay before retrying a run that ran out
+# of quota
+WATCHLIST_MIN_INTERVAL_MINUTES = int(os.getenv('WATCHLIST_MIN_INTERVAL_MINUTES', 15))
+WATCHLIST_INITIAL_LOOKBACK_HOURS = int(os.getenv('WATCHLIST_INITIAL_LOOKBACK_HOURS', 24))
+WATCHLIST_OVERLAP_MINUTES = int(os.getenv('WATCHLIST_OVERLAP_MINUTES', 60))
+WATCHLIST_RETRY_MINUTES = int(os.getenv('WATCHLIST_RETRY_MINUTES', 15))
+
+# Prometheus metrics at /metrics (see api/metrics.py): client addresses allowed
+# to scrape them, '*' for any
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
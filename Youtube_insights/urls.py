@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 
+from api.views import LivenessView, MetricsView, ReadinessView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
@@ -12,6 +14,11 @@ urlpatterns = [
     path('api/users/', include('users.urls')),
     # api
     path('api/', include('api.urls')),
+    # Prometheus scrape target
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    # Liveness and readiness probes
+    path('healthz', LivenessView.as_view(), name='healthz'),
+    path('readyz', ReadinessView.as_view(), name='readyz'),
 
 
 ]
@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        from api.metrics import record_connection
+
+        connection_created.connect(record_connection, dispatch_uid="api.metrics.record_connection")
+
+        if settings.PREWARM_CLIENTS:
+            import threading
+
+            from api.clients import warm_clients
+
+            threading.Thread(target=warm_clients, name="warm-clients", daemon=True).start()
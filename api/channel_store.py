@@ -0,0 +1,24 @@
+# api/channel_store.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from api.models import ChannelStats
+
+
+def load_fresh_channel_stats(channel_ids):
+    """Returns ``{channel_id: {"subs": ...}}`` for stored rows younger than ``CHANNEL_STATS_TTL``."""
+    cutoff = timezone.now() - timedelta(seconds=settings.CHANNEL_STATS_TTL)
+    rows = ChannelStats.objects.filter(channel_id__in=channel_ids, fetched_at__gte=cutoff)
+    return {channel_id: {"subs": subs} for channel_id, subs in rows.values_list("channel_id", "subs")}
+
+
+def save_channel_stats(stats):
+    now = timezone.now()
+    ChannelStats.objects.bulk_create(
+        [ChannelStats(channel_id=channel_id, subs=s["subs"], fetched_at=now) for channel_id, s in stats.items()],
+        update_conflicts=True,
+        unique_fields=["channel_id"],
+        update_fields=["subs", "fetched_at"],
+    )
@@ -0,0 +1,88 @@
+# api/clients.py
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+import httplib2
+from django.conf import settings
+
+_instances = {}
+_lock = threading.Lock()
+_http_pool = queue.LifoQueue()
+
+
+def _get_or_build(name, factory):
+    """Returns the process-wide instance called ``name``, building it on first use."""
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = _instances[name] = factory()
+    return instance
+
+
+def _build_youtube_service():
+    # Imported here rather than at module load: googleapiclient is slow to import.
+    from googleapiclient.discovery import build
+
+    # The discovery document bundled with the library; no network fetch, no disk cache.
+    return build(
+        "youtube", "v3",
+        developerKey=os.getenv("YOUTUBE_API_KEY"),
+        static_discovery=True,
+        cache_discovery=False,
+        client_options={"api_endpoint": settings.YOUTUBE_API_ENDPOINT} if settings.YOUTUBE_API_ENDPOINT else None,
+    )
+
+
+def _build_transcript_api():
+    from youtube_transcript_api import YouTubeTranscriptApi
+
+    return YouTubeTranscriptApi()
+
+
+def _build_openai_client():
+    from api.openai_client import OpenAIClient
+
+    return OpenAIClient()
+
+
+def get_youtube_service():
+    """The YouTube Data API resource. Only used to build requests; they run over :func:`pooled_http`."""
+    return _get_or_build("youtube", _build_youtube_service)
+
+
+def get_transcript_api():
+    return _get_or_build("transcripts", _build_transcript_api)
+
+
+def get_openai_client():
+    return _get_or_build("openai", _build_openai_client)
+
+
+@contextmanager
+def pooled_http():
+    """
+    Lends out a keep-alive ``httplib2.Http`` for one request.
+
+    httplib2 transports are not thread-safe, so each is used by one thread at
+    a time and handed back afterwards, keeping its connections open for the
+    next request on any thread.
+    """
+    try:
+        http = _http_pool.get_nowait()
+    except queue.Empty:
+        http = httplib2.Http(timeout=settings.YOUTUBE_HTTP_TIMEOUT)
+    try:
+        yield http
+    finally:
+        _http_pool.put(http)
+
+
+def warm_clients():
+    """Builds every client up front, e.g. once a server worker has started."""
+    get_youtube_service()
+    get_transcript_api()
+    get_openai_client()
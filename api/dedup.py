@@ -0,0 +1,94 @@
+# api/dedup.py
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+
+NUM_PERM = 64
+BANDS = 16  # LSH bands of NUM_PERM // BANDS rows each
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def title_shingles(title):
+    # Character trigrams, so "Episode 4" and "Episode 5" still overlap heavily.
+    text = " ".join(_WORD_RE.findall(title.lower()))
+    return {text[i:i + 3] for i in range(max(len(text) - 2, 1))} if text else set()
+
+
+def body_shingles(body):
+    words = _WORD_RE.findall(body.lower())
+    if len(words) < 2:
+        return set(words)
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def minhash(shingles):
+    """MinHash signature of a shingle set; ``None`` for an empty set."""
+    if not shingles:
+        return None
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) & 0x7FFFFFFF for s in shingles), dtype=np.uint64)
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def similarity(a, b):
+    """
+    Estimated Jaccard similarity of two signatures. An empty text tells
+    nothing, so it matches nothing, not even another empty text.
+    """
+    if a is None or b is None:
+        return 0.0
+    return float(np.mean(a == b))
+
+
+def near_duplicate_groups(documents):
+    """
+    Groups near-duplicate ``(title, body)`` documents.
+
+    Candidates come from LSH buckets over the title signatures, so indexing
+    is linear in the number of documents; each candidate pair must then reach
+    ``INSIGHT_DEDUP_TITLE_THRESHOLD`` on the title and
+    ``INSIGHT_DEDUP_BODY_THRESHOLD`` on the body, so documents without a
+    description or transcript are never grouped. Returns
+    ``{index: leader_index}`` for every document that is not its group's
+    leader, the leader being the group's first (best-ranked) document.
+    """
+    titles = [minhash(title_shingles(title)) for title, _ in documents]
+    bodies = [minhash(body_shingles(body)) for _, body in documents]
+
+    buckets = defaultdict(list)
+    rows = NUM_PERM // BANDS
+    for index, signature in enumerate(titles):
+        if signature is None:
+            continue
+        for band in range(BANDS):
+            buckets[(band, signature[band * rows:(band + 1) * rows].tobytes())].append(index)
+
+    parent = list(range(len(documents)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    checked = set()
+    for members in buckets.values():
+        for position, i in enumerate(members):
+            for j in members[position + 1:]:
+                if (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                if (similarity(titles[i], titles[j]) >= settings.INSIGHT_DEDUP_TITLE_THRESHOLD
+                        and similarity(bodies[i], bodies[j]) >= settings.INSIGHT_DEDUP_BODY_THRESHOLD):
+                    root_i, root_j = find(i), find(j)
+                    # The lower index (better rank) leads.
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    return {index: find(index) for index in range(len(documents)) if find(index) != index}
@@ -0,0 +1,139 @@
+# api/export.py
+"""
+Bulk export of stored insights as CSV or Parquet.
+
+Rows are read with a server-side cursor (``QuerySet.iterator``) and written
+out chunk by chunk, so memory stays flat however many rows are exported:
+at most ``EXPORT_CHUNK_SIZE`` rows for CSV and one row group of
+``EXPORT_PARQUET_ROW_GROUP`` rows for Parquet.
+"""
+import csv
+import io
+
+from django.conf import settings
+
+from api.filters import VideoInsightFilter
+from api.models import VideoInsight
+from api.serializers import StoredInsightSerializer
+
+EXPORT_FIELDS = [
+    "video_id", "title", "description", "channel_id", "channel_title", "views", "subs", "score",
+    "insight", "published_at", "created_at",
+]
+DEFAULT_EXPORT_FIELDS = StoredInsightSerializer.Meta.fields
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def export_columns(fields=None):
+    """The requested columns (comma-separated or a list) in order, or the defaults."""
+    if not fields:
+        return list(DEFAULT_EXPORT_FIELDS)
+    columns = [f.strip() for f in fields.split(",")] if isinstance(fields, str) else list(fields)
+    columns = list(dict.fromkeys(c for c in columns if c))
+    unknown = [c for c in columns if c not in EXPORT_FIELDS]
+    if unknown or not columns:
+        raise ExportError(f"fields must be a comma-separated subset of: {', '.join(EXPORT_FIELDS)}")
+    return columns
+
+
+def export_rows(filters, columns):
+    """Tuples of ``columns`` for every insight matching ``filters`` (the browse filters), in id order."""
+    filterset = VideoInsightFilter(filters, queryset=VideoInsight.objects.all())
+    if not filterset.is_valid():
+        raise ExportError("; ".join(f"{name}: {' '.join(errors)}" for name, errors in filterset.errors.items()))
+    return filterset.qs.order_by("id").values_list(*columns).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_csv(rows, columns):
+    """Yields the CSV as text, one chunk of rows at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in _batched(rows, settings.EXPORT_CHUNK_SIZE):
+        writer.writerows(
+            [value.isoformat() if hasattr(value, "isoformat") else value for value in row] for row in batch
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _parquet_schema(columns):
+    import pyarrow as pa
+
+    types = {
+        "IntegerField": pa.int64(),
+        "PositiveIntegerField": pa.int64(),
+        "FloatField": pa.float64(),
+        "DateTimeField": pa.timestamp("us", tz="UTC"),
+    }
+    return pa.schema([
+        (column, types.get(VideoInsight._meta.get_field(column).get_internal_type(), pa.string()))
+        for column in columns
+    ])
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose contents are handed out and dropped after every row group."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def iter_parquet(rows, columns):
+    """Yields the Parquet file as bytes, one row group at a time."""
+    # Imported here rather than at module load: pyarrow is slow to import.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema(columns)
+    sink = _Drain()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for batch in _batched(rows, settings.EXPORT_PARQUET_ROW_GROUP):
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def iter_export(file_format, rows, columns):
+    if file_format == "parquet":
+        return iter_parquet(rows, columns)
+    return (chunk.encode("utf-8") for chunk in iter_csv(rows, columns))
@@ -0,0 +1,36 @@
+# api/filters.py
+import django_filters
+from rest_framework.filters import OrderingFilter
+
+from api.models import VideoInsight
+from api.search_index import keyword_filter
+
+
+class VideoInsightFilter(django_filters.FilterSet):
+    channel_id = django_filters.CharFilter()
+    min_score = django_filters.NumberFilter(field_name="score", lookup_expr="gte")
+    max_score = django_filters.NumberFilter(field_name="score", lookup_expr="lte")
+    created_after = django_filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="gte")
+    created_before = django_filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="lt")
+    published_after = django_filters.IsoDateTimeFilter(field_name="published_at", lookup_expr="gte")
+    published_before = django_filters.IsoDateTimeFilter(field_name="published_at", lookup_expr="lt")
+    q = django_filters.CharFilter(
+        method="filter_keyword", label="Keywords (full-text on Postgres, else a substring of the title or description)",
+    )
+
+    class Meta:
+        model = VideoInsight
+        fields = []
+
+    def filter_keyword(self, queryset, name, value):
+        return queryset.filter(keyword_filter(value))
+
+
+class StableOrderingFilter(OrderingFilter):
+    """Adds the primary key as a tiebreaker so rows with equal sort values page deterministically."""
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view) or [])
+        if ordering and ordering[0].lstrip("-") != "id":
+            ordering.append("-id" if ordering[0].startswith("-") else "id")
+        return ordering
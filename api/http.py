@@ -0,0 +1,43 @@
+# api/http.py
+import asyncio
+
+import httpx
+from django.conf import settings
+
+from api.metrics import arecord_retry
+
+# httpx pools are tied to the event loop that created them, so every loop gets
+# its own clients. Under ASGI that is one long-lived loop per worker. Under
+# WSGI, async_to_sync runs each async view on a new loop, so the view must call
+# close_async_clients() before its loop ends or the clients leak.
+_loop_clients = {}
+
+
+def loop_client(name, factory):
+    """Returns the running loop's client called ``name``, building it with ``factory`` on first use."""
+    clients = _loop_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(name)
+    if client is None:
+        client = clients[name] = factory()
+    return client
+
+
+def get_async_http_client():
+    """Returns the pooled keep-alive ``httpx.AsyncClient`` for the running event loop."""
+    return loop_client("http", lambda: httpx.AsyncClient(
+        timeout=settings.ASYNC_HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=settings.ASYNC_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.ASYNC_HTTP_MAX_KEEPALIVE,
+        ),
+        event_hooks={"request": [arecord_retry]},
+    ))
+
+
+async def close_async_clients():
+    """Closes the running loop's clients and forgets them; the next call on this loop builds new ones."""
+    clients = _loop_clients.pop(asyncio.get_running_loop(), {})
+    # Every other client sends its requests through the shared httpx pool.
+    http = clients.get("http")
+    if http is not None:
+        await http.aclose()
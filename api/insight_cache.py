@@ -0,0 +1,35 @@
+# api/insight_cache.py
+from api.models import InsightCache
+from api.openai_client import INSIGHT_PROMPT_VERSION, PROMPT_VERSIONS, is_error_insight
+
+
+def load_cached_insights(video_ids):
+    """Returns ``{key: insight}`` for every cached entry of the given videos.
+
+    Keys are content hashes, so entries for an older title, transcript, model
+    or summary prompt are simply never matched; entries written by an older
+    insight or batch template are skipped by their version.
+    """
+    rows = InsightCache.objects.filter(video_id__in=video_ids, prompt_version__in=PROMPT_VERSIONS)
+    return dict(rows.values_list("key", "insight"))
+
+
+def store_insights(items, model):
+    """Caches fresh insights; an entry left by an outdated template is replaced."""
+    entries = [
+        InsightCache(
+            key=item["insight_key"],
+            video_id=item["video_id"],
+            model=model,
+            prompt_version=item.get("prompt_version", INSIGHT_PROMPT_VERSION),
+            insight=item["insight"],
+        )
+        for item in items
+        if not item.get("insight_cached") and not is_error_insight(item["insight"])
+    ]
+    InsightCache.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=["key"],
+        update_fields=["model", "prompt_version", "insight", "created_at"],
+    )
@@ -0,0 +1,34 @@
+# api/job_worker.py
+"""
+Entry points of the search job worker processes (see :mod:`api.jobs`).
+
+Workers are spawned, so each starts a fresh interpreter and imports this
+module to unpickle the initializer. It must not import models or the
+pipeline at load time: the app registry is only ready once
+:func:`init_worker` has run ``django.setup()``.
+"""
+import os
+
+
+def init_worker(settings_module, database_names):
+    """
+    Sets Django up in a new worker, on the same databases as the parent.
+
+    ``database_names`` maps each alias to the parent's database name, which
+    differs from the configured one under the test runner.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+
+    django.setup()
+
+    from django.db import connections
+
+    for alias, name in database_names.items():
+        connections[alias].settings_dict["NAME"] = name
+
+
+def run_job(job_id):
+    from api.jobs import run_job
+
+    run_job(job_id)
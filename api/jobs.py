@@ -0,0 +1,132 @@
+# api/jobs.py
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from api import job_worker
+from api.clients import get_openai_client
+from api.models import SearchJob
+from api.pipeline import InsightPipeline, collect_candidates, rank_videos, save_results
+from api.quota import QuotaScheduler
+from api.serializers import VideoInsightSerializer
+from api.youtube_client import YouTubeClient
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def make_job_pool(workers):
+    """
+    A pool of spawned (not forked: the parent holds DB connections and
+    threads) worker processes. Submit :func:`api.job_worker.run_job` to it,
+    not :func:`run_job`, which workers cannot import before Django is set up.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=job_worker.init_worker,
+        initargs=(
+            os.environ.get("DJANGO_SETTINGS_MODULE", "Youtube_insights.settings"),
+            {conn.alias: conn.settings_dict["NAME"] for conn in connections.all()},
+        ),
+    )
+
+
+def get_job_pool():
+    """Returns the process pool that runs search jobs, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = make_job_pool(settings.SEARCH_JOB_WORKERS)
+        return _pool
+
+
+def submit_job(job):
+    # Dispatch only once the row is committed so the worker is sure to see it.
+    transaction.on_commit(lambda: get_job_pool().submit(job_worker.run_job, job.pk))
+
+
+def claim_job(job_id):
+    """
+    Marks a queued job as running, from scratch (a requeued job may carry
+    progress from its dead worker); returns ``False`` if another worker got it first.
+    """
+    return SearchJob.objects.filter(pk=job_id, status="queued").update(
+        status="running", progress=0, total=0, results=[], updated_at=timezone.now(),
+    ) == 1
+
+
+def heartbeat(job_id, stop):
+    """Touches the running job's ``updated_at`` until ``stop`` is set, so its lease never lapses while it is alive."""
+    try:
+        while not stop.wait(settings.SEARCH_JOB_LEASE_SECONDS / 3):
+            SearchJob.objects.filter(pk=job_id, status="running").update(updated_at=timezone.now())
+    finally:
+        connection.close()
+
+
+def requeue_stale_jobs(now=None):
+    """Requeues running jobs whose lease has lapsed, i.e. whose worker died; returns their ids."""
+    stale = SearchJob.objects.filter(
+        status="running",
+        updated_at__lt=(now or timezone.now()) - timedelta(seconds=settings.SEARCH_JOB_LEASE_SECONDS),
+    )
+    job_ids = list(stale.values_list("pk", flat=True))
+    stale.filter(pk__in=job_ids).update(status="queued")
+    for job_id in job_ids:
+        logger.warning(f"Search job {job_id} lost its worker; requeued")
+    return job_ids
+
+
+def run_job(job_id):
+    """Runs the search pipeline for one job, saving progress and partial results as it goes."""
+    if not claim_job(job_id):
+        return
+    job = SearchJob.objects.get(pk=job_id)
+
+    stop = threading.Event()
+    threading.Thread(target=heartbeat, args=(job_id, stop), daemon=True).start()
+    quota = QuotaScheduler.for_user(job.user)
+    try:
+        yt = YouTubeClient(quota=quota)
+        openai_client = get_openai_client()
+        videos, video_stats, channel_stats = collect_candidates(
+            yt, job.query, job.published_after or None, job.candidates,
+        )
+        ranked = rank_videos(videos, video_stats, channel_stats, job.max_results, job.scoring or None)
+
+        job.total = len(ranked)
+        job.save(update_fields=["total", "updated_at"])
+
+        results = [None] * len(ranked)
+        pipeline = InsightPipeline(yt, openai_client)
+        for index, result, error in pipeline.iter_completed(ranked):
+            if error is not None:
+                logger.warning(f"Job {job_id}: error processing video {ranked[index]['video_id']}: {error}")
+            else:
+                results[index] = result
+            job.progress += 1
+            job.results = VideoInsightSerializer([r for r in results if r is not None], many=True).data
+            job.save(update_fields=["progress", "results", "updated_at"])
+
+        save_results([r for r in results if r is not None], openai_client.model)
+        job.status = "done"
+    except Exception as e:
+        logger.error(f"Search job {job_id} failed: {e}", exc_info=True)
+        job.status = "failed"
+        job.error = str(e)
+    finally:
+        stop.set()
+        quota.flush()
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at", "updated_at"])
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from api.models import Watchlist
+from api.watchlists import crawl, due_watchlists
+
+
+class Command(BaseCommand):
+    help = (
+        "Crawls due watchlists incrementally: only videos published since each watchlist's last run are "
+        "searched, ranked and analysed. Run it from cron, or keep it running with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None, help="Crawl at most this many watchlists per pass.")
+        parser.add_argument("--loop", action="store_true", help="Keep running, waking up when the next watchlist is due.")
+        parser.add_argument("--max-sleep", type=int, default=60, help="Longest wait between passes with --loop (seconds).")
+        parser.add_argument("--dry-run", action="store_true", help="Only list the watchlists that are due.")
+
+    def handle(self, *args, **options):
+        while True:
+            self.run_pass(options["limit"], options["dry_run"])
+            if not options["loop"] or options["dry_run"]:
+                return
+            close_old_connections()
+            time.sleep(self.seconds_until_next(options["max_sleep"]))
+
+    def run_pass(self, limit, dry_run):
+        for watchlist in due_watchlists(limit=limit).select_related("user"):
+            if dry_run:
+                self.stdout.write(f"Due: #{watchlist.pk} {watchlist.query!r} (since {watchlist.published_after_mark or 'never'})")
+                continue
+            processed = crawl(watchlist)
+            self.stdout.write(f"#{watchlist.pk} {watchlist.query!r}: {len(processed)} new video(s)")
+
+    @staticmethod
+    def seconds_until_next(max_sleep):
+        upcoming = Watchlist.objects.filter(active=True).order_by("next_run_at").values_list("next_run_at", flat=True).first()
+        if upcoming is None:
+            return max_sleep
+        return min(max(1.0, (upcoming - timezone.now()).total_seconds()), max_sleep)
@@ -0,0 +1,56 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.export import EXPORT_FIELDS, EXPORT_FORMATS, ExportError, export_columns, export_rows, iter_export
+from api.filters import VideoInsightFilter
+
+
+class Command(BaseCommand):
+    help = "Streams stored insights to a CSV or Parquet file without loading them all into memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="File to write; '-' writes CSV to stdout.")
+        parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default=None,
+                            help="Defaults to the output file's extension, else csv.")
+        parser.add_argument("--fields", default=None, help=f"Comma-separated columns from: {', '.join(EXPORT_FIELDS)}")
+        parser.add_argument(
+            "--filter", action="append", default=[], metavar="NAME=VALUE",
+            help=f"Browse filter, repeatable: {', '.join(VideoInsightFilter.base_filters)}",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        file_format = options["format"] or ("parquet" if output.endswith(".parquet") else "csv")
+        if output == "-" and file_format == "parquet":
+            raise CommandError("Parquet needs an output file")
+
+        filters = {}
+        for item in options["filter"]:
+            name, sep, value = item.partition("=")
+            if not sep:
+                raise CommandError(f"--filter expects NAME=VALUE, got {item!r}")
+            filters[name] = value
+
+        try:
+            columns = export_columns(options["fields"])
+            rows = export_rows(filters, columns)
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        exported = 0
+
+        def counted(rows):
+            nonlocal exported
+            for row in rows:
+                exported += 1
+                yield row
+
+        stream = sys.stdout.buffer if output == "-" else open(output, "wb")
+        try:
+            for chunk in iter_export(file_format, counted(rows), columns):
+                stream.write(chunk)
+        finally:
+            if stream is not sys.stdout.buffer:
+                stream.close()
+        self.stderr.write(f"Exported {exported} insight(s) as {file_format}")
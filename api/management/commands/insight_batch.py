@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.clients import get_openai_client
+from api.models import VideoInsight
+from api.openai_batch import fetch_batch_output, ingest_batch_output, submit_batch_file, write_batch_file
+from api.transcript_store import load_transcripts
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates insights offline through the OpenAI Batch API: write a JSONL request file for stored "
+        "videos, submit it, then ingest the results. Set OPENAI_BASE_URL to run against a local stand-in server."
+    )
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest="action", required=True)
+
+        write = subparsers.add_parser("write", help="Write batch requests for stored videos without a cached insight.")
+        write.add_argument("path")
+        write.add_argument("--limit", type=int, default=None)
+
+        submit = subparsers.add_parser("submit", help="Upload a request file and create a batch.")
+        submit.add_argument("path")
+
+        ingest = subparsers.add_parser("ingest", help="Store the results of a completed batch.")
+        source = ingest.add_mutually_exclusive_group(required=True)
+        source.add_argument("--batch-id")
+        source.add_argument("--file", help="A batch output JSONL file already downloaded.")
+
+    def handle(self, *args, **options):
+        openai_client = get_openai_client()
+        action = options["action"]
+
+        if action == "write":
+            rows = VideoInsight.objects.order_by("-score").values("video_id", "title", "description")
+            if options["limit"]:
+                rows = rows[:options["limit"]]
+            videos = list(rows)
+            transcripts = load_transcripts([video["video_id"] for video in videos])
+            for video in videos:
+                video["transcript"] = transcripts.get(video["video_id"], "")
+            written = write_batch_file(openai_client, videos, options["path"])
+            self.stdout.write(f"Wrote {written} request(s) to {options['path']}")
+
+        elif action == "submit":
+            batch = submit_batch_file(openai_client, options["path"])
+            self.stdout.write(f"Submitted batch {batch.id} ({batch.status})")
+
+        elif action == "ingest":
+            if options["file"]:
+                with open(options["file"], encoding="utf-8") as f:
+                    output = f.read()
+            else:
+                status, output = fetch_batch_output(openai_client, options["batch_id"])
+                if output is None:
+                    raise CommandError(f"Batch {options['batch_id']} is not complete yet (status: {status})")
+            stored = ingest_batch_output(output, openai_client.model)
+            self.stdout.write(f"Ingested {stored} insight(s)")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.search_index import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Re-indexes every stored insight for full-text search, e.g. after a backfill or a FULLTEXT_CONFIG change."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        indexed = rebuild_search_index(options["batch_size"])
+        self.stdout.write(f"Indexed {indexed} video(s)")
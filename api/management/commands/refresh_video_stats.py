@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+
+from api.models import VideoInsight
+from api.quota import QuotaExceeded, QuotaScheduler
+from api.scoring import stored_score
+from api.snapshots import due_for_refresh, record_snapshots
+from api.youtube_client import MAX_IDS_PER_CALL, YouTubeClient, chunked
+
+
+class Command(BaseCommand):
+    help = (
+        "Snapshots views, likes and subscribers of tracked videos whose last snapshot is older than "
+        "their SNAPSHOT_REFRESH_TIERS interval. Costs about one quota unit per 50 videos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None, help="Refresh at most this many videos (most overdue first).")
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many videos are due.")
+
+    def handle(self, *args, **options):
+        due = due_for_refresh()
+        if options["limit"]:
+            due = due[:options["limit"]]
+        video_ids = list(due)
+        if options["dry_run"]:
+            self.stdout.write(f"{len(video_ids)} video(s) due for a refresh")
+            return
+
+        quota = QuotaScheduler.for_user(None)
+        yt = YouTubeClient(quota=quota)
+        refreshed = 0
+        try:
+            for batch in chunked(video_ids, MAX_IDS_PER_CALL):
+                video_stats = yt.get_video_stats(batch)
+                channel_stats = yt.get_channel_stats(list({s["channel_id"] for s in video_stats.values()}))
+
+                rows = list(VideoInsight.objects.filter(video_id__in=video_stats).only("video_id", "subs"))
+                snapshots = []
+                for row in rows:
+                    stats = video_stats[row.video_id]
+                    row.views = stats["views"]
+                    row.subs = channel_stats.get(stats["channel_id"], {}).get("subs", row.subs) or 1
+                    row.score = stored_score(row.views, row.subs)
+                    snapshots.append({"video_id": row.video_id, "views": row.views, "likes": stats["likes"], "subs": row.subs})
+                VideoInsight.objects.bulk_update(rows, ["views", "subs", "score"])
+                record_snapshots(snapshots)
+                refreshed += len(snapshots)
+        except QuotaExceeded as e:
+            self.stderr.write(f"Stopped early: {e}")
+        finally:
+            quota.flush()
+
+        self.stdout.write(f"Refreshed {refreshed} of {len(video_ids)} due video(s)")
@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.job_worker import run_job
+from api.jobs import make_job_pool, requeue_stale_jobs
+from api.models import SearchJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs queued search jobs, e.g. ones left behind by a restarted API server, and requeues running "
+        "jobs whose worker died (no heartbeat for SEARCH_JOB_LEASE_SECONDS)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit instead of polling.")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds between polls of the job table.")
+        parser.add_argument("--workers", type=int, default=settings.SEARCH_JOB_WORKERS)
+
+    def handle(self, *args, **options):
+        dispatched = set()
+        with make_job_pool(options["workers"]) as pool:
+            while True:
+                # Jobs whose worker died go back in the queue, and may be dispatched again.
+                dispatched.difference_update(requeue_stale_jobs())
+                queued = SearchJob.objects.filter(status="queued").order_by("created_at").values_list("pk", flat=True)
+                job_ids = [job_id for job_id in queued if job_id not in dispatched]
+                for job_id in job_ids:
+                    pool.submit(run_job, job_id)
+                dispatched.update(job_ids)
+                if job_ids:
+                    self.stdout.write(f"Dispatched {len(job_ids)} job(s)")
+
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
@@ -0,0 +1,236 @@
+# api/metrics.py
+"""
+In-process metrics for the search pipeline.
+
+Code that calls YouTube, OpenAI or the database wraps the call in
+:func:`span`. Every span feeds the counters and histograms served in the
+Prometheus text format by :func:`render`. Spans opened while a request is
+being timed (see :class:`api.middleware.ServerTimingMiddleware`) are also
+summed per stage for that request's ``Server-Timing`` header.
+
+The registry lives in process memory, so every server worker exposes its
+own numbers; scrape each worker, or let Prometheus sum them.
+"""
+import bisect
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIX = "youtube_insights"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# The OpenAI SDK retries failed requests itself and numbers each attempt in this header.
+RETRY_HEADER = "x-stainless-retry-count"
+
+_registry = []
+_request_timing = contextvars.ContextVar("request_timing", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = f"{PREFIX}_{name}"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key, extra=()):
+        pairs = [*zip(self.labelnames, key), *extra]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            values = sorted((key, self._snapshot(value)) for key, value in self._values.items())
+        for key, value in values:
+            lines.extend(self._samples(key, value))
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    @staticmethod
+    def _snapshot(value):
+        return value
+
+    def _samples(self, key, value):
+        yield f"{self.name}{self._labels(key)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    @staticmethod
+    def _snapshot(value):
+        counts, total = value
+        return list(counts), total
+
+    def _samples(self, key, value):
+        counts, total = value
+        cumulative = 0
+        for bound, count in zip((*self.buckets, math.inf), counts):
+            cumulative += count
+            yield f"{self.name}_bucket{self._labels(key, [('le', _format_value(bound))])} {cumulative}"
+        yield f"{self.name}_sum{self._labels(key)} {_format_value(total)}"
+        yield f"{self.name}_count{self._labels(key)} {cumulative}"
+
+
+STAGE_CALLS = Counter("stage_calls_total", "Calls to YouTube, OpenAI and the database, by stage.", ["stage"])
+STAGE_ERRORS = Counter("stage_errors_total", "Stage calls that failed.", ["stage"])
+STAGE_DURATION = Histogram("stage_duration_seconds", "Wall-clock duration of stage calls.", ["stage"])
+HTTP_RETRIES = Counter("http_retries_total", "HTTP requests that retried an earlier failed attempt, by host.", ["host"])
+DB_CONNECTIONS = Counter("db_connections_total", "Database connections opened, by alias.", ["alias"])
+OPENAI_TOKENS = Counter("openai_tokens_total", "Tokens used by OpenAI requests, by model and kind.", ["model", "kind"])
+
+
+def render():
+    """Every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class RequestTiming:
+    """Time spent per stage during one request; safe to fill from several threads."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def add(self, stage, seconds):
+        with self._lock:
+            calls, total = self._stages.get(stage, (0, 0.0))
+            self._stages[stage] = (calls + 1, total + seconds)
+
+    def header(self):
+        """The ``Server-Timing`` value, or ``""`` if no stage ran. Concurrent calls add up, so a stage can exceed ``total``."""
+        with self._lock:
+            stages = sorted(self._stages.items())
+        if not stages:
+            return ""
+        parts = [f'{stage};dur={total * 1000:.1f};desc="{calls} calls"' for stage, (calls, total) in stages]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+@contextmanager
+def request_timing():
+    """Collects the spans of the current request, including those run through :func:`bind`."""
+    timing = RequestTiming()
+    token = _request_timing.set(timing)
+    try:
+        yield timing
+    finally:
+        _request_timing.reset(token)
+
+
+def bind(func):
+    """
+    Wraps ``func`` so spans it opens on a worker thread count towards the
+    calling request. Thread pools do not carry context variables over.
+    """
+    timing = _request_timing.get()
+    if timing is None:
+        return func
+
+    def bound(*args, **kwargs):
+        token = _request_timing.set(timing)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _request_timing.reset(token)
+    return bound
+
+
+class Span:
+    def __init__(self, stage):
+        self.stage = stage
+        self.failed = False
+
+
+@contextmanager
+def span(stage):
+    """
+    Times one call to ``stage`` (e.g. ``"youtube.search.list"``).
+
+    An exception marks the call as failed; code that swallows its own
+    errors can set ``failed`` on the yielded span instead.
+    """
+    current = Span(stage)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException:
+        current.failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_CALLS.inc(stage=stage)
+        if current.failed:
+            STAGE_ERRORS.inc(stage=stage)
+        STAGE_DURATION.observe(elapsed, stage=stage)
+        timing = _request_timing.get()
+        if timing is not None:
+            timing.add(stage, elapsed)
+
+
+def record_usage(response):
+    """Counts the tokens of an OpenAI chat completion."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    OPENAI_TOKENS.inc(usage.prompt_tokens or 0, model=response.model, kind="prompt")
+    OPENAI_TOKENS.inc(usage.completion_tokens or 0, model=response.model, kind="completion")
+
+
+def record_connection(sender, connection, **kwargs):
+    """``connection_created`` receiver; with persistent connections this should stay flat under load."""
+    DB_CONNECTIONS.inc(alias=connection.alias)
+
+
+def record_retry(request):
+    """``httpx`` request hook counting the retries the OpenAI SDK makes on its own."""
+    if request.headers.get(RETRY_HEADER, "0") not in ("", "0"):
+        HTTP_RETRIES.inc(host=request.url.host)
+
+
+async def arecord_retry(request):
+    record_retry(request)
@@ -0,0 +1,41 @@
+# api/middleware.py
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from api.metrics import request_timing
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a ``Server-Timing`` header with the time each stage took while the
+    view ran (see :func:`api.metrics.span`); responses without any span are
+    left alone.
+
+    Streaming responses only report the work done before the first byte.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_timing() as timing:
+            response = self.get_response(request)
+        return self._annotate(response, timing)
+
+    async def __acall__(self, request):
+        with request_timing() as timing:
+            response = await self.get_response(request)
+        return self._annotate(response, timing)
+
+    @staticmethod
+    def _annotate(response, timing):
+        header = timing.header()
+        if header:
+            response["Server-Timing"] = header
+        return response
@@ -0,0 +1,125 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:24
+
+import django.contrib.postgres.search
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel_id', models.CharField(max_length=32, unique=True)),
+                ('subs', models.PositiveIntegerField()),
+                ('fetched_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InsightCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('video_id', models.CharField(db_index=True, max_length=32)),
+                ('model', models.CharField(max_length=64)),
+                ('prompt_version', models.CharField(max_length=16)),
+                ('insight', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuotaUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('call_type', models.CharField(max_length=32)),
+                ('calls', models.PositiveIntegerField(default=0)),
+                ('units', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('query', models.CharField(max_length=255)),
+                ('max_results', models.PositiveIntegerField(default=50)),
+                ('candidates', models.PositiveIntegerField(default=50)),
+                ('published_after', models.CharField(blank=True, max_length=32)),
+                ('scoring', models.CharField(blank=True, max_length=32)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='queued', max_length=10)),
+                ('progress', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('results', models.JSONField(default=list)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Transcript',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('video_id', models.CharField(max_length=32)),
+                ('language', models.CharField(max_length=16)),
+                ('status', models.CharField(choices=[('fetched', 'Fetched'), ('unavailable', 'Unavailable')], max_length=12)),
+                ('data', models.BinaryField(blank=True, default=b'')),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('fetched_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VideoInsight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('video_id', models.CharField(max_length=32, unique=True)),
+                ('title', models.TextField()),
+                ('description', models.TextField(blank=True)),
+                ('channel_id', models.CharField(blank=True, max_length=64)),
+                ('channel_title', models.CharField(blank=True, max_length=255)),
+                ('views', models.PositiveIntegerField()),
+                ('subs', models.PositiveIntegerField()),
+                ('score', models.FloatField()),
+                ('insight', models.TextField()),
+                ('published_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VideoStatSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('video_id', models.CharField(max_length=32)),
+                ('ts', models.DateTimeField()),
+                ('views', models.PositiveBigIntegerField()),
+                ('likes', models.PositiveBigIntegerField()),
+                ('subs', models.PositiveBigIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Watchlist',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(max_length=255)),
+                ('max_results', models.PositiveIntegerField(default=50)),
+                ('candidates', models.PositiveIntegerField(default=50)),
+                ('scoring', models.CharField(blank=True, max_length=32)),
+                ('interval_minutes', models.PositiveIntegerField(default=60)),
+                ('active', models.BooleanField(default=True)),
+                ('published_after_mark', models.DateTimeField(blank=True, null=True)),
+                ('next_run_at', models.DateTimeField()),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('last_results', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:24
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('api', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quotausage',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='searchjob',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='transcript',
+            unique_together={('video_id', 'language')},
+        ),
+        migrations.AddIndex(
+            model_name='videoinsight',
+            index=models.Index(fields=['-score', '-id'], name='videoinsight_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='videoinsight',
+            index=models.Index(fields=['-created_at', '-id'], name='videoinsight_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='videoinsight',
+            index=models.Index(fields=['channel_id', '-score'], name='videoinsight_channel_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='videoinsight',
+            index=models.Index(fields=['channel_id', '-created_at'], name='videoinsight_channel_new_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='videoinsight',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='videoinsight_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='videostatsnapshot',
+            index=models.Index(fields=['video_id', '-ts'], name='snapshot_video_ts_idx'),
+        ),
+        migrations.AddField(
+            model_name='watchlist',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='watchlists', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='quotausage',
+            unique_together={('day', 'user', 'call_type')},
+        ),
+        migrations.AddIndex(
+            model_name='watchlist',
+            index=models.Index(fields=['active', 'next_run_at'], name='watchlist_due_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='watchlist',
+            unique_together={('user', 'query')},
+        ),
+    ]
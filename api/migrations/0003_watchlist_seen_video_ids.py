@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='watchlist',
+            name='seen_video_ids',
+            field=models.JSONField(default=list),
+        ),
+    ]
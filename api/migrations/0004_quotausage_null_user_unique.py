@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def merge_duplicate_rows(apps, schema_editor):
+    """Folds rows the old constraint let through (anonymous usage) into one per day and call type."""
+    QuotaUsage = apps.get_model("api", "QuotaUsage")
+    kept = {}
+    for row in QuotaUsage.objects.order_by("pk"):
+        key = (row.day, row.user_id, row.call_type)
+        if key not in kept:
+            kept[key] = row
+            continue
+        kept[key].calls += row.calls
+        kept[key].units += row.units
+        kept[key].save(update_fields=["calls", "units"])
+        row.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_watchlist_seen_video_ids'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rows, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='quotausage',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='quotausage',
+            constraint=models.UniqueConstraint(fields=('day', 'user', 'call_type'), name='quotausage_day_user_call_uniq', nulls_distinct=False),
+        ),
+    ]
@@ -1,3 +1,9 @@
+import gzip
+import uuid
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
@@ -5,12 +11,169 @@ class VideoInsight(models.Model):
     video_id = models.CharField(max_length=32, unique=True)
     title = models.TextField()
     description = models.TextField(blank=True)
+    channel_id = models.CharField(max_length=64, blank=True)
     channel_title = models.CharField(max_length=255, blank=True)
     views = models.PositiveIntegerField()
     subs = models.PositiveIntegerField()
+    # Views per subscriber (api.scoring.stored_score), whichever formula ranked the search
     score = models.FloatField()
     insight = models.TextField()
+    published_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Postgres full-text index over title, description, insight and transcript,
+    # kept up to date by api.search_index
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-score", "-id"], name="videoinsight_score_idx"),
+            models.Index(fields=["-created_at", "-id"], name="videoinsight_created_idx"),
+            # Browse: one channel's videos by score or recency
+            models.Index(fields=["channel_id", "-score"], name="videoinsight_channel_score_idx"),
+            models.Index(fields=["channel_id", "-created_at"], name="videoinsight_channel_new_idx"),
+            GinIndex(fields=["search_vector"], name="videoinsight_search_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title[:50]} ({self.score})"
+
+
+class InsightCache(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    video_id = models.CharField(max_length=32, db_index=True)
+    model = models.CharField(max_length=64)
+    prompt_version = models.CharField(max_length=16)
+    insight = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.video_id} [{self.model}/{self.prompt_version}]"
+
+
+class ChannelStats(models.Model):
+    channel_id = models.CharField(max_length=32, unique=True)
+    subs = models.PositiveIntegerField()
+    fetched_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.channel_id} ({self.subs})"
+
+
+class QuotaUsage(models.Model):
+    day = models.DateField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    call_type = models.CharField(max_length=32)
+    calls = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # One row per day, user and call type, anonymous (NULL user) included
+            models.UniqueConstraint(
+                fields=["day", "user", "call_type"], nulls_distinct=False, name="quotausage_day_user_call_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.call_type}: {self.units}"
+
+
+class SearchJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.CASCADE)
+    query = models.CharField(max_length=255)
+    max_results = models.PositiveIntegerField(default=50)
+    candidates = models.PositiveIntegerField(default=50)
+    published_after = models.CharField(max_length=32, blank=True)
+    scoring = models.CharField(max_length=32, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued', db_index=True)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    results = models.JSONField(default=list)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.query} [{self.status}]"
+
+
+class Transcript(models.Model):
+    STATUS_CHOICES = [
+        ('fetched', 'Fetched'),
+        ('unavailable', 'Unavailable'),
+    ]
+
+    video_id = models.CharField(max_length=32)
+    language = models.CharField(max_length=16)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES)
+    # gzip-compressed UTF-8 text; only loaded when a transcript is actually needed
+    data = models.BinaryField(blank=True, default=b"")
+    size = models.PositiveIntegerField(default=0)
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("video_id", "language")
+
+    @property
+    def text(self):
+        return gzip.decompress(self.data).decode("utf-8") if self.data else ""
+
+    def __str__(self):
+        return f"{self.video_id} [{self.language}] {self.status}"
+
+
+class VideoStatSnapshot(models.Model):
+    # Append-only; one row per video per refresh
+    video_id = models.CharField(max_length=32)
+    ts = models.DateTimeField()
+    views = models.PositiveBigIntegerField()
+    likes = models.PositiveBigIntegerField()
+    subs = models.PositiveBigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["video_id", "-ts"], name="snapshot_video_ts_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.video_id} @ {self.ts:%Y-%m-%d %H:%M}: {self.views}"
+
+
+class Watchlist(models.Model):
+    """A saved search crawled on a schedule; each run only looks at videos newer than ``published_after_mark``."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="watchlists")
+    query = models.CharField(max_length=255)
+    max_results = models.PositiveIntegerField(default=50)
+    candidates = models.PositiveIntegerField(default=50)
+    scoring = models.CharField(max_length=32, blank=True)
+    interval_minutes = models.PositiveIntegerField(default=60)
+    active = models.BooleanField(default=True)
+    # High-water mark: newest publish time seen so far
+    published_after_mark = models.DateTimeField(null=True, blank=True)
+    # Videos the latest run saw inside the next run's overlap window, ranked in or not
+    seen_video_ids = models.JSONField(default=list)
+    next_run_at = models.DateTimeField()
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    # Videos found by the latest run
+    last_results = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("user", "query")
+        indexes = [
+            models.Index(fields=["active", "next_run_at"], name="watchlist_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.query} every {self.interval_minutes}m"
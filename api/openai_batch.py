@@ -0,0 +1,104 @@
+# api/openai_batch.py
+import io
+import json
+import logging
+
+from api.insight_cache import store_insights
+from api.models import InsightCache, VideoInsight
+from api.search_index import update_search_index
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+
+def batch_request(openai_client, video, key):
+    """
+    One Batch API request line; ``custom_id`` carries the video id and its insight cache key.
+
+    The prompt is built exactly as the online path builds it, long
+    transcripts summarized by ``fit_transcript``, so the answer can be cached
+    under the same key.
+    """
+    transcript = openai_client.fit_transcript(video.get("transcript", ""))
+    return {
+        "custom_id": f"{video['video_id']}:{key}",
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": openai_client.model,
+            "messages": openai_client.build_messages(video["title"], video["description"], transcript),
+            "max_tokens": 100,
+            "temperature": 0.7,
+        },
+    }
+
+
+def write_batch_file(openai_client, videos, path):
+    """Writes requests for the videos that have no cached insight yet; returns how many were written."""
+    keyed = [
+        (video, openai_client.insight_key(video["title"], video["description"], video.get("transcript", "")))
+        for video in videos
+    ]
+    cached = set(InsightCache.objects.filter(key__in=[key for _, key in keyed]).values_list("key", flat=True))
+
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for video, key in keyed:
+            if key in cached:
+                continue
+            f.write(json.dumps(batch_request(openai_client, video, key), ensure_ascii=False) + "\n")
+            written += 1
+    return written
+
+
+def submit_batch_file(openai_client, path):
+    with open(path, "rb") as f:
+        uploaded = openai_client.client.files.create(file=f, purpose="batch")
+    batch = openai_client.client.batches.create(
+        input_file_id=uploaded.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+    )
+    return batch
+
+
+def fetch_batch_output(openai_client, batch_id):
+    """Returns ``(status, output_text)``; the text is ``None`` until the batch has completed."""
+    batch = openai_client.client.batches.retrieve(batch_id)
+    if batch.status != "completed" or not batch.output_file_id:
+        return batch.status, None
+    return batch.status, openai_client.client.files.content(batch.output_file_id).text
+
+
+def ingest_batch_output(output, model):
+    """Stores every successful answer in the insight cache and on its ``VideoInsight`` row."""
+    items = []
+    for line in io.StringIO(output):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            video_id, key = record["custom_id"].split(":", 1)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                raise ValueError(record.get("error") or f"status {response.get('status_code')}")
+            insight = response["body"]["choices"][0]["message"]["content"].strip()
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            logger.warning(f"Skipping batch output line: {e}")
+            continue
+        items.append({"video_id": video_id, "insight_key": key, "insight": insight})
+
+    store_insights(items, model)
+
+    rows = {
+        row.video_id: row
+        for row in VideoInsight.objects.filter(video_id__in=[i["video_id"] for i in items]).only("video_id")
+    }
+    for item in items:
+        if item["video_id"] in rows:
+            rows[item["video_id"]].insight = item["insight"]
+    VideoInsight.objects.bulk_update(rows.values(), ["insight"])
+    update_search_index(rows)
+    return len(items)
+
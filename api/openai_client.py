@@ -1,29 +1,280 @@
 # api/openai_client.py
+import asyncio
+import hashlib
+import json
+import logging
 import os
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from api import metrics
+from api.http import get_async_http_client, loop_client
+from api.prompting import count_tokens, iter_chunks, truncate_to_tokens
+
+# Static instructions go first (as the system message) so the shared prefix
+# can be served from the provider's prompt cache.
+SYSTEM_PROMPT = (
+    "You are a YouTube content analyst. Based on the video's title, description and transcript, "
+    "explain in 1–2 sentences why this video might be performing well, focusing on emotional hook, clarity, or unique topic."
+)
+PROMPT_TEMPLATE = "Title: {title}\n\nDescription: {description}\n\nTranscript: {transcript}\n\nInsight:"
+SUMMARY_INSTRUCTIONS = (
+    "Summarize this part of a YouTube video transcript in a few sentences. "
+    "Keep the hook, the main points and any memorable lines."
+)
+BATCH_INSTRUCTIONS = (
+    "You are a YouTube content analyst. For every video below, explain in 1–2 sentences why it might be "
+    "performing well, focusing on emotional hook, clarity, or unique topic.\n"
+    'Reply with a JSON object of the form {"insights": {"<video_id>": "<insight>", ...}} '
+    "with one entry for every video_id."
+)
+BATCH_VIDEO_TEMPLATE = "video_id: {video_id}\nTitle: {title}\nDescription: {description}\nTranscript: {transcript}"
+
+
+def prompt_version(*parts):
+    return hashlib.sha256("\0".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:12]
+
+
+# Each version covers only the templates and budgets that shape its output, so
+# editing one prompt invalidates just the cache entries it produced. Insights
+# record the version of the template that wrote them (single or batched);
+# the summary version is part of the key of long transcripts only.
+INSIGHT_PROMPT_VERSION = prompt_version(
+    SYSTEM_PROMPT, PROMPT_TEMPLATE,
+    settings.INSIGHT_DESCRIPTION_TOKEN_BUDGET, settings.INSIGHT_TRANSCRIPT_TOKEN_BUDGET,
+)
+BATCH_PROMPT_VERSION = prompt_version(
+    BATCH_INSTRUCTIONS, BATCH_VIDEO_TEMPLATE,
+    settings.INSIGHT_DESCRIPTION_TOKEN_BUDGET, settings.INSIGHT_TRANSCRIPT_TOKEN_BUDGET,
+)
+SUMMARY_PROMPT_VERSION = prompt_version(
+    SUMMARY_INSTRUCTIONS, settings.INSIGHT_SUMMARY_MODEL, settings.INSIGHT_TRANSCRIPT_TOKEN_BUDGET,
+    settings.INSIGHT_SUMMARY_CHUNK_TOKENS, settings.INSIGHT_SUMMARY_MAX_CHUNKS,
+)
+PROMPT_VERSIONS = (INSIGHT_PROMPT_VERSION, BATCH_PROMPT_VERSION)
+
+ERROR_PREFIX = "Error generating insight"
+
+logger = logging.getLogger(__name__)
+
+
+def is_error_insight(insight):
+    return insight.startswith(ERROR_PREFIX)
 
 
 class OpenAIClient:
+    """
+    Use the process-wide instance from :func:`api.clients.get_openai_client`;
+    building one imports the OpenAI SDK and opens its connection pool.
+    """
+
     def __init__(self, model="gpt-4o"):
+        # Imported here rather than at module load: the SDK is slow to import.
+        from openai import DefaultHttpxClient, OpenAI
+
         self.model = model
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-    def generate_insight(self, title, description):
-        prompt = (
-            "You are a YouTube content analyst. Based on the title and description below, "
-            "explain in 1–2 sentences why this video might be performing well, focusing on emotional hook, clarity, or unique topic.\n\n"
-            f"Title: {title}\n\n"
-            f"Description: {description}\n\n"
-            "Insight:"
+        self.client = OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=DefaultHttpxClient(event_hooks={"request": [metrics.record_retry]}),
+            timeout=settings.OPENAI_TIMEOUT,
+            max_retries=settings.OPENAI_MAX_RETRIES,
         )
 
+    @property
+    def async_client(self):
+        """The ``AsyncOpenAI`` client of the running event loop (see :mod:`api.http`)."""
+        from openai import AsyncOpenAI
+
+        return loop_client("openai", lambda: AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=get_async_http_client(),
+            timeout=settings.OPENAI_TIMEOUT,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+        ))
+
+    def insight_key(self, title, description, transcript=""):
+        """
+        Content address of an insight: the prompt inputs and the model, plus
+        the summary prompt version when the transcript is too long to send
+        whole. The template version is stored with the entry instead.
+        """
+        summarized = count_tokens(transcript) > settings.INSIGHT_TRANSCRIPT_TOKEN_BUDGET
+        digest = hashlib.sha256()
+        for part in (self.model, SUMMARY_PROMPT_VERSION if summarized else "", title, description, transcript):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    @staticmethod
+    def _fit(description, transcript):
+        # Hard caps; long transcripts should already have gone through fit_transcript.
+        return (
+            truncate_to_tokens(description, settings.INSIGHT_DESCRIPTION_TOKEN_BUDGET),
+            truncate_to_tokens(transcript.strip(), settings.INSIGHT_TRANSCRIPT_TOKEN_BUDGET),
+        )
+
+    def build_messages(self, title, description, transcript=""):
+        description, transcript = self._fit(description, transcript)
+        prompt = PROMPT_TEMPLATE.format(title=title, description=description, transcript=transcript or "(none)")
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ]
+
+    @staticmethod
+    def _summary_request(chunk):
+        return {
+            "model": settings.INSIGHT_SUMMARY_MODEL,
+            "messages": [
+                {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+                {"role": "user", "content": chunk},
+            ],
+            "max_tokens": max(50, settings.INSIGHT_TRANSCRIPT_TOKEN_BUDGET // settings.INSIGHT_SUMMARY_MAX_CHUNKS),
+            "temperature": 0,
+        }
+
+    @staticmethod
+    def _summary_fallback(chunk):
+        return truncate_to_tokens(chunk, settings.INSIGHT_TRANSCRIPT_TOKEN_BUDGET // settings.INSIGHT_SUMMARY_MAX_CHUNKS)
+
+    def _summarize(self, chunk):
+        try:
+            with metrics.span("openai.summary"):
+                response = self.client.chat.completions.create(**self._summary_request(chunk))
+            metrics.record_usage(response)
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            logger.warning(f"Transcript chunk summary failed, truncating instead: {e}")
+            return self._summary_fallback(chunk)
+
+    async def _asummarize(self, chunk):
+        try:
+            with metrics.span("openai.summary"):
+                response = await self.async_client.chat.completions.create(**self._summary_request(chunk))
+            metrics.record_usage(response)
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            logger.warning(f"Transcript chunk summary failed, truncating instead: {e}")
+            return self._summary_fallback(chunk)
+
+    @staticmethod
+    def _transcript_chunks(transcript):
+        return iter_chunks(transcript, settings.INSIGHT_SUMMARY_CHUNK_TOKENS, settings.INSIGHT_SUMMARY_MAX_CHUNKS)
+
+    @staticmethod
+    def _reduce(summaries):
+        return truncate_to_tokens("\n".join(s for s in summaries if s), settings.INSIGHT_TRANSCRIPT_TOKEN_BUDGET)
+
+    def fit_transcript(self, transcript):
+        """
+        Returns the transcript unchanged if it fits ``INSIGHT_TRANSCRIPT_TOKEN_BUDGET``,
+        otherwise a map-reduce summary of it: the chunks are summarized
+        concurrently, and the joined summaries are capped at the budget.
+        """
+        if count_tokens(transcript) <= settings.INSIGHT_TRANSCRIPT_TOKEN_BUDGET:
+            return transcript
+        with ThreadPoolExecutor(max_workers=settings.INSIGHT_SUMMARY_MAX_CHUNKS) as pool:
+            return self._reduce(pool.map(metrics.bind(self._summarize), self._transcript_chunks(transcript)))
+
+    async def afit_transcript(self, transcript):
+        if count_tokens(transcript) <= settings.INSIGHT_TRANSCRIPT_TOKEN_BUDGET:
+            return transcript
+        summaries = await asyncio.gather(*(self._asummarize(chunk) for chunk in self._transcript_chunks(transcript)))
+        return self._reduce(summaries)
+
+    def generate_insight(self, title, description, transcript=""):
+        try:
+            transcript = self.fit_transcript(transcript)
+            with metrics.span("openai.insight"):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=self.build_messages(title, description, transcript),
+                    max_tokens=100,
+                    temperature=0.7,
+                )
+            metrics.record_usage(response)
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            return f"{ERROR_PREFIX}: {str(e)}"
+
+    def pack_batches(self, videos):
+        """Greedily groups videos into batches that fit the per-request token budget."""
+        batches, current, used = [], [], 0
+        for video in videos:
+            cost = count_tokens(self._batch_entry(video))
+            if current and (used + cost > settings.INSIGHT_BATCH_TOKEN_BUDGET
+                            or len(current) >= settings.INSIGHT_BATCH_MAX_VIDEOS):
+                batches.append(current)
+                current, used = [], 0
+            current.append(video)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    @classmethod
+    def _batch_entry(cls, video):
+        description, transcript = cls._fit(video["description"], video.get("transcript", ""))
+        return BATCH_VIDEO_TEMPLATE.format(
+            video_id=video["video_id"], title=video["title"], description=description, transcript=transcript or "(none)",
+        )
+
+    def generate_insights_batch(self, videos):
+        """
+        Generates insights for several videos with one structured-JSON request.
+
+        ``videos`` are dicts with ``video_id``, ``title``, ``description`` and an
+        optional ``transcript``. Videos the model leaves out or answers with
+        something other than a non-empty string fall back to single calls.
+        Returns ``{video_id: (insight, prompt_version)}``, the version telling
+        which of the two templates produced the insight.
+        """
+        videos = [{**video, "transcript": self.fit_transcript(video.get("transcript", ""))} for video in videos]
+        insights = {}
+        if len(videos) > 1:
+            content = "\n\n---\n\n".join(self._batch_entry(video) for video in videos)
+            try:
+                with metrics.span("openai.batch"):
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": BATCH_INSTRUCTIONS},
+                            {"role": "user", "content": content},
+                        ],
+                        response_format={"type": "json_object"},
+                        max_tokens=100 * len(videos),
+                        temperature=0.7,
+                    )
+                metrics.record_usage(response)
+                parsed = json.loads(response.choices[0].message.content).get("insights", {})
+                expected = {video["video_id"] for video in videos}
+                insights = {
+                    video_id: (insight.strip(), BATCH_PROMPT_VERSION)
+                    for video_id, insight in parsed.items()
+                    if video_id in expected and isinstance(insight, str) and insight.strip()
+                }
+            except Exception as e:
+                logger.warning(f"Batched insight request for {len(videos)} videos failed: {e}")
+
+        for video in videos:
+            if video["video_id"] not in insights:
+                insights[video["video_id"]] = self.generate_insight(
+                    video["title"], video["description"], video.get("transcript", ""),
+                ), INSIGHT_PROMPT_VERSION
+        return insights
+
+    async def agenerate_insight(self, title, description, transcript=""):
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=100,
-                temperature=0.7,
-            )
+            transcript = await self.afit_transcript(transcript)
+            with metrics.span("openai.insight"):
+                response = await self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=self.build_messages(title, description, transcript),
+                    max_tokens=100,
+                    temperature=0.7,
+                )
+            metrics.record_usage(response)
             return response.choices[0].message.content.strip()
         except Exception as e:
-            return f"Error generating insight: {str(e)}"
+            return f"{ERROR_PREFIX}: {str(e)}"
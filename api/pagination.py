@@ -0,0 +1,10 @@
+# api/pagination.py
+from rest_framework.pagination import CursorPagination
+
+
+class InsightCursorPagination(CursorPagination):
+    """Keyset pagination: each page is an index range scan, however deep the client pages."""
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = "-score"
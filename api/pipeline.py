@@ -0,0 +1,383 @@
+# api/pipeline.py
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, as_completed
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from api import metrics, scoring
+from api.dedup import near_duplicate_groups
+from api.insight_cache import load_cached_insights, store_insights
+from api.models import VideoInsight
+from api.openai_client import INSIGHT_PROMPT_VERSION
+from api.search_index import update_search_index
+from api.snapshots import load_velocities, record_snapshots
+from api.transcript_store import load_transcripts, save_transcripts
+
+logger = logging.getLogger(__name__)
+
+_EXHAUSTED = object()
+
+
+def prefetch(iterable):
+    """Iterates ``iterable`` one step ahead on a background thread.
+
+    While the caller works on the current item the next one is already being
+    fetched, which overlaps search pagination with the stats lookups.
+    """
+    iterator = iter(iterable)
+    advance = metrics.bind(next)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch") as pool:
+        future = pool.submit(advance, iterator, _EXHAUSTED)
+        while True:
+            item = future.result()
+            if item is _EXHAUSTED:
+                return
+            future = pool.submit(advance, iterator, _EXHAUSTED)
+            yield item
+
+
+def unique_videos(items, seen=None):
+    """``items`` without repeated ``video_id``s, keeping the first of each; ids are added to ``seen``."""
+    seen = set() if seen is None else seen
+    unique = []
+    for item in items:
+        if item["video_id"] not in seen:
+            seen.add(item["video_id"])
+            unique.append(item)
+    return unique
+
+
+def collect_candidates(yt, query, published_after=None, target=50):
+    """
+    Pages through the search up to ``target`` videos and gathers their stats.
+
+    Video stats for each page are fetched in the background while later pages
+    download; channel stats go through the store on the calling thread.
+    Search pages can overlap, so videos already seen on an earlier page are
+    dropped. Returns ``(videos, video_stats, channel_stats)``.
+    """
+    yt.reserve_search(target)
+    videos, seen, channel_stats = [], set(), {}
+    with ThreadPoolExecutor(max_workers=settings.YOUTUBE_STATS_CONCURRENCY, thread_name_prefix="yt-page") as pool:
+        video_futures = []
+        get_video_stats = metrics.bind(yt.get_video_stats)
+        for page in prefetch(yt.iter_search_videos(query, published_after, target)):
+            page = unique_videos(page, seen)
+            if not page:
+                continue
+            videos.extend(page)
+            video_futures.append(pool.submit(get_video_stats, [v["video_id"] for v in page]))
+            new_channels = [v["channel_id"] for v in page if v["channel_id"] not in channel_stats]
+            channel_stats.update(yt.get_channel_stats(new_channels))
+
+        video_stats = {}
+        for future in video_futures:
+            video_stats.update(future.result())
+    return videos, video_stats, channel_stats
+
+
+async def acollect_candidates(yt, query, published_after=None, target=50):
+    """Async counterpart of :func:`collect_candidates`."""
+    await yt.areserve_search(target)
+    videos, seen, video_tasks, channel_tasks, seen_channels = [], set(), [], [], set()
+    async for page in yt.aiter_search_videos(query, published_after, target):
+        page = unique_videos(page, seen)
+        if not page:
+            continue
+        videos.extend(page)
+        video_tasks.append(asyncio.create_task(yt.aget_video_stats([v["video_id"] for v in page])))
+        new_channels = list({v["channel_id"] for v in page} - seen_channels)
+        seen_channels.update(new_channels)
+        channel_tasks.append(asyncio.create_task(yt.aget_channel_stats(new_channels)))
+
+    video_stats, channel_stats = {}, {}
+    for stats in await asyncio.gather(*video_tasks):
+        video_stats.update(stats)
+    for stats in await asyncio.gather(*channel_tasks):
+        channel_stats.update(stats)
+    return videos, video_stats, channel_stats
+
+
+def rank_videos(videos, video_stats, channel_stats, max_results, formula=None):
+    """
+    Ranks candidates with a formula from :mod:`api.scoring` (``SCORING_FORMULA`` by default).
+
+    Formulas built on velocity read the stat snapshots, so call this from a
+    thread that may use the database.
+    """
+    formula = formula or settings.SCORING_FORMULA
+    velocities = None
+    if formula in scoring.HISTORY_SCORERS:
+        velocities = load_velocities([v["video_id"] for v in videos])
+    return scoring.rank(videos, video_stats, channel_stats, max_results, formula, velocities)
+
+
+INSIGHT_FIELDS = ["title", "description", "channel_id", "channel_title", "views", "subs", "insight"]
+
+
+def save_results(results, model):
+    """
+    Upserts all processed videos in one statement, caches their new insights,
+    records a stats snapshot for each one due (which also starts tracking new
+    ones) and re-indexes them for full-text search. Postgres rejects an upsert that
+    touches a row twice, so repeated videos are dropped first.
+    """
+    results = unique_videos(results)
+    with metrics.span("db.save_results"):
+        VideoInsight.objects.bulk_create(
+            [
+                VideoInsight(
+                    video_id=item["video_id"],
+                    published_at=parse_datetime(item.get("published_at") or ""),
+                    # The response keeps the requested formula's score; rows get the canonical one.
+                    score=scoring.stored_score(item["views"], item["subs"]),
+                    **{f: item[f] for f in INSIGHT_FIELDS},
+                )
+                for item in results
+            ],
+            update_conflicts=True,
+            unique_fields=["video_id"],
+            update_fields=INSIGHT_FIELDS + ["score", "published_at"],
+        )
+        store_insights(results, model)
+        record_snapshots(results, only_due=True)
+        update_search_index([item["video_id"] for item in results])
+
+
+class InsightPipeline:
+    """
+    Fetches transcripts and generates insights for ranked videos concurrently.
+
+    Every video runs as its own task on a bounded thread pool; transcript and
+    LLM calls are additionally throttled by separate semaphores so one stage
+    cannot starve the other. Results keep the ranking order and a failure in
+    one video never affects the rest.
+
+    Insights already in the cache for identical prompt inputs are reused
+    instead of calling the LLM, and stored transcripts (or "unavailable"
+    markers) are reused instead of fetching them again. Both stores are read
+    up front and written back afterwards on the calling thread, so worker
+    threads never touch the database.
+
+    With ``batch_insights`` the misses are packed several per LLM request
+    (see :meth:`OpenAIClient.generate_insights_batch`) once all transcripts
+    are in, trading a little latency for far fewer round-trips.
+
+    With ``dedup`` near-duplicate videos (re-uploads, compilations, series
+    episodes; see :func:`api.dedup.near_duplicate_groups`) are grouped up
+    front. Only each group's leader is processed; the others reuse its
+    insight and point at it through ``duplicate_of``.
+    """
+
+    def __init__(self, yt, openai_client, max_workers=None, transcript_concurrency=None, llm_concurrency=None,
+                 batch_insights=None, dedup=None):
+        self.yt = yt
+        self.openai_client = openai_client
+        self.max_workers = max_workers or settings.PIPELINE_MAX_WORKERS
+        self.transcript_concurrency = transcript_concurrency or settings.PIPELINE_TRANSCRIPT_CONCURRENCY
+        self.llm_concurrency = llm_concurrency or settings.PIPELINE_LLM_CONCURRENCY
+        self._transcript_slots = threading.BoundedSemaphore(self.transcript_concurrency)
+        self._llm_slots = threading.BoundedSemaphore(self.llm_concurrency)
+        self.batch_insights = settings.INSIGHT_BATCH_MODE if batch_insights is None else batch_insights
+        self.dedup = settings.INSIGHT_DEDUP if dedup is None else dedup
+        self.cached_insights = {}
+        self.stored_transcripts = {}
+        self.fetched_transcripts = {}
+        self.duplicates = defaultdict(list)
+        self._abandoned = threading.Event()
+
+    def prepare(self, items):
+        """Loads the stores and groups near-duplicates; returns the indexes of the items to process."""
+        video_ids = [item["video_id"] for item in items]
+        self.cached_insights = load_cached_insights(video_ids)
+        self.stored_transcripts = load_transcripts(video_ids)
+        self.fetched_transcripts = {}
+
+        self.duplicates = defaultdict(list)
+        if self.dedup and len(items) > 1:
+            documents = [
+                (item["title"], f"{item['description']} {self.stored_transcripts.get(item['video_id'], '')[:settings.INSIGHT_DEDUP_TRANSCRIPT_CHARS]}")
+                for item in items
+            ]
+            for index, leader in near_duplicate_groups(documents).items():
+                self.duplicates[leader].append(index)
+        followers = {index for group in self.duplicates.values() for index in group}
+        return [index for index in range(len(items)) if index not in followers]
+
+    def _with_duplicates(self, items, leader, result):
+        """Yields ``(index, result)`` for a leader and every near-duplicate sharing its insight."""
+        yield leader, {**result, "duplicate_of": None}
+        for index in self.duplicates.get(leader, []):
+            yield index, {
+                **items[index],
+                "insight": result["insight"],
+                "insight_key": result["insight_key"],
+                # Nothing new to cache: the insight belongs to the leader's inputs.
+                "insight_cached": True,
+                "duplicate_of": items[leader]["video_id"],
+            }
+
+    def save_transcripts(self):
+        fetched, self.fetched_transcripts = self.fetched_transcripts, {}
+        save_transcripts(fetched)
+
+    def _remember_transcript(self, video_id, fetched):
+        status, language, text = fetched
+        if status is not None:
+            self.fetched_transcripts[video_id] = fetched
+        return text
+
+    def _with_insight(self, item, key, insight, prompt_version=INSIGHT_PROMPT_VERSION):
+        return {
+            **item, "insight": insight, "insight_key": key, "insight_cached": key in self.cached_insights,
+            "prompt_version": prompt_version,
+        }
+
+    def _fetch_transcript(self, item):
+        video_id = item["video_id"]
+        if video_id in self.stored_transcripts:
+            return self.stored_transcripts[video_id]
+        with self._transcript_slots:
+            fetched = self.yt.fetch_transcript(video_id)
+        return self._remember_transcript(video_id, fetched)
+
+    def _check_abandoned(self):
+        if self._abandoned.is_set():
+            raise CancelledError("The caller stopped reading results")
+
+    def process(self, item):
+        transcript = self._fetch_transcript(item)
+
+        key = self.openai_client.insight_key(item["title"], item["description"], transcript)
+        insight = self.cached_insights.get(key)
+        if insight is None:
+            with self._llm_slots:
+                self._check_abandoned()
+                insight = self.openai_client.generate_insight(item["title"], item["description"], transcript)
+        return self._with_insight(item, key, insight)
+
+    def process_batch(self, videos):
+        """Generates insights for several cache misses with one batched LLM request."""
+        with self._llm_slots:
+            self._check_abandoned()
+            insights = self.openai_client.generate_insights_batch(videos)
+        return [
+            self._with_insight(
+                {k: v for k, v in video.items() if k not in ("transcript", "index", "insight_key")},
+                video["insight_key"],
+                *insights[video["video_id"]],
+            )
+            for video in videos
+        ]
+
+    def _submit_each(self, pool, items):
+        process = metrics.bind(lambda item: [self.process(item)])
+        return {pool.submit(process, item): [index] for index, item in enumerate(items)}
+
+    def _submit_batched(self, pool, items):
+        """Fetches every transcript, then submits the cache misses as packed LLM batches."""
+        tasks, misses = {}, []
+        for index, (item, transcript) in enumerate(zip(items, pool.map(metrics.bind(self._fetch_transcript), items))):
+            key = self.openai_client.insight_key(item["title"], item["description"], transcript)
+            if key in self.cached_insights:
+                done = Future()
+                done.set_result([self._with_insight(item, key, self.cached_insights[key])])
+                tasks[done] = [index]
+            else:
+                misses.append({**item, "transcript": transcript, "index": index, "insight_key": key})
+
+        for batch in self.openai_client.pack_batches(misses):
+            tasks[pool.submit(metrics.bind(self.process_batch), batch)] = [video["index"] for video in batch]
+        return tasks
+
+    def iter_completed(self, items):
+        """
+        Yields ``(index, result, error)`` for each item as soon as it finishes.
+
+        Closing the generator early (e.g. a streaming client went away)
+        cancels the work not started yet, so no LLM call is made for results
+        nobody will read.
+        """
+        if not items:
+            return
+
+        leaders = self.prepare(items)
+        leader_items = [items[index] for index in leaders]
+        workers = min(self.max_workers, len(leader_items))
+        self._abandoned = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="insight")
+        try:
+            if self.batch_insights:
+                tasks = self._submit_batched(pool, leader_items)
+            else:
+                tasks = self._submit_each(pool, leader_items)
+            for future in as_completed(tasks):
+                positions = tasks[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    for position in positions:
+                        leader = leaders[position]
+                        for index in [leader, *self.duplicates.get(leader, [])]:
+                            yield index, items[index], e
+                    continue
+                for position, result in zip(positions, results):
+                    for index, grouped in self._with_duplicates(items, leaders[position], result):
+                        yield index, grouped, None
+        except GeneratorExit:
+            self._abandoned.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        finally:
+            pool.shutdown(wait=True)
+            self.save_transcripts()
+
+    def run(self, items):
+        """Processes all items and returns the successful ones in their original order."""
+        results = [None] * len(items)
+        for index, result, error in self.iter_completed(items):
+            if error is not None:
+                logger.warning(f"Error processing video {items[index]['video_id']}: {error}")
+                continue
+            results[index] = result
+        return [r for r in results if r is not None]
+
+    async def aprocess(self, item, transcript_slots, llm_slots):
+        video_id = item["video_id"]
+        if video_id in self.stored_transcripts:
+            transcript = self.stored_transcripts[video_id]
+        else:
+            async with transcript_slots:
+                transcript = self._remember_transcript(video_id, await self.yt.afetch_transcript(video_id))
+
+        key = self.openai_client.insight_key(item["title"], item["description"], transcript)
+        insight = self.cached_insights.get(key)
+        if insight is None:
+            async with llm_slots:
+                insight = await self.openai_client.agenerate_insight(item["title"], item["description"], transcript)
+        return self._with_insight(item, key, insight)
+
+    async def arun(self, items):
+        """Async counterpart of :meth:`run` using the same per-stage limits."""
+        leaders = await sync_to_async(self.prepare)(items)
+        transcript_slots = asyncio.Semaphore(self.transcript_concurrency)
+        llm_slots = asyncio.Semaphore(self.llm_concurrency)
+        outcomes = await asyncio.gather(
+            *(self.aprocess(items[index], transcript_slots, llm_slots) for index in leaders),
+            return_exceptions=True,
+        )
+        await sync_to_async(self.save_transcripts)()
+
+        results = [None] * len(items)
+        for leader, outcome in zip(leaders, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"Error processing video {items[leader]['video_id']}: {outcome}")
+                continue
+            for index, grouped in self._with_duplicates(items, leader, outcome):
+                results[index] = grouped
+        return [r for r in results if r is not None]
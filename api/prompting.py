@@ -0,0 +1,77 @@
+# api/prompting.py
+import functools
+import math
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a character heuristic
+    tiktoken = None
+
+TIKTOKEN_ENCODING = "o200k_base"
+CHARS_PER_TOKEN = 4
+
+
+@functools.lru_cache(maxsize=1)
+def get_encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(TIKTOKEN_ENCODING)
+    except Exception:
+        # The encoding file is downloaded on first use; offline hosts get the heuristic.
+        return None
+
+
+def count_tokens(text):
+    encoding = get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    # Roughly four characters per token for English text.
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cuts ``text`` down to at most ``max_tokens``, on a word boundary where possible."""
+    if max_tokens <= 0:
+        return ""
+    encoding = get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens]).rstrip()
+
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > 0 else limit].rstrip()
+
+
+def iter_chunks(text, chunk_tokens, max_chunks=None):
+    """
+    Yields consecutive pieces of ``text`` of about ``chunk_tokens`` tokens each.
+
+    With ``max_chunks`` only that many evenly spaced pieces are yielded, so the
+    cost of summarizing a very long text stays bounded. Pieces are cut lazily
+    on word boundaries rather than tokenizing the whole text up front.
+    """
+    total = max(1, math.ceil(count_tokens(text) / chunk_tokens))
+    if max_chunks and total > max_chunks:
+        keep = {round(i * (total - 1) / (max_chunks - 1)) for i in range(max_chunks)} if max_chunks > 1 else {0}
+    else:
+        keep = None
+
+    size = math.ceil(len(text) / total)
+    start = 0
+    for index in range(total):
+        if start >= len(text):
+            break
+        end = len(text) if index == total - 1 else start + size
+        if end < len(text):
+            space = text.rfind(" ", start, end)
+            if space > start:
+                end = space
+        if keep is None or index in keep:
+            yield text[start:end].strip()
+        start = end
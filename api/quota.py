@@ -0,0 +1,209 @@
+# api/quota.py
+import asyncio
+import math
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from api.models import QuotaUsage
+
+# YouTube Data API v3 cost of one call, in quota units
+QUOTA_COSTS = {
+    "search.list": 100,
+    "videos.list": 1,
+    "channels.list": 1,
+}
+# Results per search.list page, and so ids per stats call that follows it
+SEARCH_PAGE_SIZE = 50
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+def quota_day():
+    # The Data API quota resets at midnight Pacific time.
+    return datetime.now(ZoneInfo(settings.YOUTUBE_QUOTA_TIMEZONE)).date()
+
+
+def search_cost(candidates):
+    """
+    The most quota a scan of ``candidates`` search results can use: every page
+    costs one search.list plus one videos.list and one channels.list call.
+    """
+    pages = max(1, math.ceil(candidates / SEARCH_PAGE_SIZE))
+    return pages * sum(QUOTA_COSTS.values())
+
+
+def max_candidates():
+    """The largest scan the token bucket can admit at once, capped by ``SEARCH_MAX_CANDIDATES``."""
+    pages = max(1, bucket.capacity // search_cost(1))
+    return min(settings.SEARCH_MAX_CANDIDATES, pages * SEARCH_PAGE_SIZE)
+
+
+def usage_for_day(day, user=None):
+    rows = QuotaUsage.objects.filter(day=day)
+    if user is not None:
+        rows = rows.filter(user=user)
+    return rows.aggregate(total=Sum("units"))["total"] or 0
+
+
+class TokenBucket:
+    """Thread-safe token bucket; callers reserve tokens and sleep off any deficit."""
+
+    def __init__(self, capacity, refill_rate):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def available(self):
+        with self._lock:
+            self._refill()
+            return self.tokens
+
+    def reserve(self, units, max_wait):
+        """Takes ``units`` and returns how long to wait before using them, or ``None`` to shed."""
+        with self._lock:
+            self._refill()
+            wait = max(0.0, (units - self.tokens) / self.refill_rate)
+            if wait > max_wait:
+                return None
+            self.tokens -= units
+            return wait
+
+    def refund(self, units):
+        """Hands back reserved tokens that were not used."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + units)
+
+
+# One bucket per process: every client in this worker draws from it.
+bucket = TokenBucket(
+    capacity=settings.YOUTUBE_QUOTA_BUCKET_CAPACITY,
+    refill_rate=settings.YOUTUBE_DAILY_QUOTA / (24 * 60 * 60),
+)
+
+
+class QuotaScheduler:
+    """
+    Admits YouTube Data API calls against the daily quota.
+
+    Each call first has to fit in what is left of today's quota and then in
+    the process-wide token bucket, which spreads the quota over the day. A
+    call that would wait longer than ``YOUTUBE_QUOTA_MAX_WAIT`` is shed with
+    :class:`QuotaExceeded`. Usage is counted in memory and written to the
+    ledger by :meth:`flush`, so worker threads never touch the database.
+
+    A search that makes many calls should :meth:`reserve` its whole cost
+    first, so it is shed before spending anything rather than part-way
+    through; its calls then draw on the reservation without waiting.
+
+    The daily check only sees usage other schedulers have already flushed,
+    plus this one's. Searches in flight elsewhere are invisible, so the
+    ledger can overshoot the daily quota by up to one bucket
+    (``YOUTUBE_QUOTA_BUCKET_CAPACITY``) per worker process; keep
+    ``YOUTUBE_DAILY_QUOTA`` that far below the real project quota.
+    """
+
+    def __init__(self, user=None, used_today=0):
+        self.user = user
+        self.day = quota_day()
+        self.used_today = used_today
+        self._pending = defaultdict(lambda: [0, 0])
+        self._reserved = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_user(cls, user=None):
+        if user is not None and not user.is_authenticated:
+            user = None
+        return cls(user=user, used_today=usage_for_day(quota_day()))
+
+    def _take(self, units):
+        # Callers hold self._lock.
+        if self.used_today + self._reserved + units > settings.YOUTUBE_DAILY_QUOTA:
+            raise QuotaExceeded("Daily YouTube API quota exhausted")
+        if units > bucket.capacity:
+            raise QuotaExceeded(f"{units} quota units can never fit the {bucket.capacity}-unit bucket; scan fewer candidates")
+        wait = bucket.reserve(units, settings.YOUTUBE_QUOTA_MAX_WAIT)
+        if wait is None:
+            raise QuotaExceeded("YouTube API quota is rate limited, try again later")
+        return wait
+
+    def _reserve(self, units):
+        with self._lock:
+            wait = self._take(units)
+            self._reserved += units
+        return wait
+
+    def reserve(self, units):
+        """Admits ``units`` for calls made later; what they leave unused goes back to the bucket on :meth:`flush`."""
+        wait = self._reserve(units)
+        if wait:
+            time.sleep(wait)
+
+    async def areserve(self, units):
+        wait = self._reserve(units)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def _admit(self, call_type):
+        units = QUOTA_COSTS[call_type]
+        with self._lock:
+            if self._reserved >= units:
+                self._reserved -= units
+                wait = 0
+            else:
+                wait = self._take(units)
+            self.used_today += units
+            pending = self._pending[call_type]
+            pending[0] += 1
+            pending[1] += units
+        return wait
+
+    def acquire(self, call_type):
+        wait = self._admit(call_type)
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self, call_type):
+        wait = self._admit(call_type)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(lambda: [0, 0])
+            unused, self._reserved = self._reserved, 0
+        if unused:
+            bucket.refund(unused)
+
+        for call_type, (calls, units) in pending.items():
+            self._record(call_type, calls, units)
+
+    def _record(self, call_type, calls, units):
+        """Adds to today's ledger row, creating it on first use."""
+        rows = QuotaUsage.objects.filter(day=self.day, user=self.user, call_type=call_type)
+        increment = {"calls": F("calls") + calls, "units": F("units") + units}
+        if rows.update(**increment):
+            return
+        try:
+            with transaction.atomic():
+                QuotaUsage.objects.create(day=self.day, user=self.user, call_type=call_type, calls=calls, units=units)
+        except IntegrityError:
+            # Another process created the row first.
+            rows.update(**increment)
@@ -0,0 +1,141 @@
+# api/scoring.py
+from datetime import datetime, timezone
+
+import numpy as np
+from django.conf import settings
+
+SCORERS = {}
+# Formulas that read the "velocity" column, which needs stat snapshots
+HISTORY_SCORERS = set()
+
+
+def scorer(name, history=False):
+    """Registers a scoring formula under ``name``; formulas map a column dict to one score per video."""
+    def register(func):
+        SCORERS[name] = func
+        if history:
+            HISTORY_SCORERS.add(name)
+        return func
+    return register
+
+
+def candidate_columns(videos, video_stats, channel_stats, velocities=None, now=None):
+    """
+    Lays the candidate set out as NumPy columns, one row per video.
+
+    ``velocity`` is recent views per day from ``velocities``, falling back to
+    the lifetime average for videos without enough snapshots.
+    """
+    now = now or datetime.now(timezone.utc)
+    stats = [video_stats.get(v["video_id"], {}) for v in videos]
+
+    # YouTube returns "2024-01-01T00:00:00Z"; numpy only parses naive timestamps.
+    published = np.array(
+        [v.get("published_at", "")[:19] or "NaT" for v in videos], dtype="datetime64[s]",
+    )
+    age_days = (np.datetime64(now.replace(tzinfo=None), "s") - published) / np.timedelta64(1, "D")
+    # Unknown publish dates get the typical age rather than favouring them.
+    known = ~np.isnan(age_days)
+    age_days[~known] = np.median(age_days[known]) if known.any() else 1.0
+
+    cols = {
+        "views": np.array([s.get("views", 0) for s in stats], dtype=np.float64),
+        "likes": np.array([s.get("likes", 0) for s in stats], dtype=np.float64),
+        "subs": np.array([channel_stats.get(v["channel_id"], {}).get("subs", 0) for v in videos], dtype=np.float64),
+        "age_days": age_days.clip(min=1.0),
+    }
+    velocities = velocities or {}
+    velocity = np.array([velocities.get(v["video_id"], np.nan) for v in videos], dtype=np.float64)
+    cols["velocity"] = np.where(np.isnan(velocity), cols["views"] / cols["age_days"], velocity)
+    return cols
+
+
+@scorer("ratio")
+def ratio(cols):
+    return cols["views"] / np.maximum(cols["subs"], 1)
+
+
+def stored_score(views, subs):
+    """
+    The score persisted on ``VideoInsight`` rows: the "ratio" formula, whatever
+    formula ranked the search, so stored rows stay comparable.
+    """
+    return round(views / max(subs, 1), 4)
+
+
+@scorer("log_ratio")
+def log_ratio(cols):
+    # Dampens the huge spread of view and subscriber counts.
+    return np.log1p(cols["views"]) - np.log1p(cols["subs"])
+
+
+@scorer("views_per_day")
+def views_per_day(cols):
+    return cols["views"] / cols["age_days"]
+
+
+@scorer("like_rate")
+def like_rate(cols):
+    # Shrunk towards the candidate set's overall like rate so a handful of
+    # views cannot produce a perfect score.
+    prior_views = settings.SCORING_PRIOR_VIEWS
+    overall = cols["likes"].sum() / max(cols["views"].sum(), 1)
+    return (cols["likes"] + prior_views * overall) / (cols["views"] + prior_views)
+
+
+@scorer("bayesian_ratio")
+def bayesian_ratio(cols):
+    # Views per subscriber with a prior of SCORING_PRIOR_SUBS subscribers at
+    # the median ratio, so tiny channels need real evidence to rank first.
+    prior_subs = settings.SCORING_PRIOR_SUBS
+    subs = cols["subs"]
+    known = subs > 0
+    median = np.median(cols["views"][known] / subs[known]) if known.any() else 0.0
+    return (cols["views"] + prior_subs * median) / (subs + prior_subs)
+
+
+@scorer("velocity", history=True)
+def velocity(cols):
+    return cols["velocity"]
+
+
+@scorer("breakout", history=True)
+def breakout(cols):
+    # Recent views per day against the lifetime average: above 1 means the
+    # video is speeding up.
+    return cols["velocity"] / np.maximum(cols["views"] / cols["age_days"], 1)
+
+
+def top_k(scores, k):
+    """Indexes of the ``k`` highest scores, best first, without sorting the whole array."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def rank(videos, video_stats, channel_stats, max_results, formula=None, velocities=None):
+    """Scores every candidate with ``formula`` and returns the best ``max_results`` result rows."""
+    if not videos or max_results <= 0:
+        return []
+    cols = candidate_columns(videos, video_stats, channel_stats, velocities)
+    scores = SCORERS[formula or settings.SCORING_FORMULA](cols)
+
+    results = []
+    for index in top_k(scores, max_results):
+        v = videos[index]
+        stats = video_stats.get(v["video_id"], {})
+        results.append({
+            "video_id": v["video_id"],
+            "title": v["title"],
+            "channel_id": v["channel_id"],
+            "channel_title": v["channel_title"],
+            "published_at": v.get("published_at", ""),
+            "views": int(cols["views"][index]),
+            "likes": int(cols["likes"][index]),
+            "subs": int(cols["subs"][index]) or 1,
+            "velocity": round(float(cols["velocity"][index]), 2),
+            "score": round(float(scores[index]), 4),
+            "description": stats.get("description", ""),
+        })
+    return results
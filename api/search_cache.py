@@ -0,0 +1,67 @@
+# api/search_cache.py
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+from api.openai_client import is_error_insight
+
+logger = logging.getLogger(__name__)
+
+
+def get_search_cache():
+    return caches[settings.SEARCH_CACHE_ALIAS]
+
+
+def search_cache_key(query, published_after, max_results, candidates, scoring):
+    normalized = json.dumps([" ".join(query.lower().split()), published_after or "", max_results, candidates, scoring])
+    return "search:" + hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def get_cached_search(key):
+    """Returns ``(payload, is_stale)``; ``(None, False)`` on a miss.
+
+    Entries are fresh for ``SEARCH_CACHE_TTL`` seconds and may then be served
+    stale for another ``SEARCH_CACHE_STALE_TTL`` seconds while they refresh.
+    """
+    entry = get_search_cache().get(key)
+    if entry is None:
+        return None, False
+    return entry["payload"], time.time() - entry["stored_at"] > settings.SEARCH_CACHE_TTL
+
+
+def set_cached_search(key, payload):
+    """Caches a search payload; returns ``False`` without caching if an insight in it failed, so the next search retries."""
+    if any(is_error_insight(row["insight"]) for row in payload):
+        return False
+    get_search_cache().set(
+        key,
+        {"payload": payload, "stored_at": time.time()},
+        timeout=settings.SEARCH_CACHE_TTL + settings.SEARCH_CACHE_STALE_TTL,
+    )
+    return True
+
+
+def refresh_in_background(key, compute):
+    """Recomputes ``key`` on a background thread unless a refresh for it is already running."""
+    cache = get_search_cache()
+    lock_key = f"{key}:refreshing"
+    if not cache.add(lock_key, True, timeout=settings.SEARCH_CACHE_REFRESH_TIMEOUT):
+        return False
+
+    def refresh():
+        try:
+            set_cached_search(key, compute())
+        except Exception as e:
+            logger.warning(f"Background refresh of {key} failed: {e}")
+        finally:
+            cache.delete(lock_key)
+            connections.close_all()
+
+    threading.Thread(target=refresh, name="search-refresh", daemon=True).start()
+    return True
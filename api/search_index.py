@@ -0,0 +1,121 @@
+# api/search_index.py
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, Q, Value
+
+from api.models import VideoInsight
+from api.transcript_store import load_transcripts
+
+# SQLite stand-in for the tsvector column, created on first use
+FTS_TABLE = "api_videoinsight_fts"
+# bm25 weights for the FTS5 columns (video_id, title, description, insight, transcript)
+FTS_WEIGHTS = (0.0, 10.0, 2.0, 5.0, 1.0)
+
+
+def _use_postgres():
+    return connection.vendor == "postgresql"
+
+
+def _search_vector(transcript):
+    config = settings.FULLTEXT_CONFIG
+    return (
+        SearchVector("title", weight="A", config=config)
+        + SearchVector("insight", weight="B", config=config)
+        + SearchVector("description", weight="C", config=config)
+        + SearchVector(Value(transcript), weight="D", config=config)
+    )
+
+
+def _ensure_fts_table(cursor):
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        "USING fts5(video_id UNINDEXED, title, description, insight, transcript)"
+    )
+
+
+def update_search_index(video_ids):
+    """Re-indexes the given videos from their stored fields and transcripts."""
+    video_ids = list(video_ids)
+    if not video_ids:
+        return
+    transcripts = {
+        video_id: text[:settings.FULLTEXT_TRANSCRIPT_CHARS]
+        for video_id, text in load_transcripts(video_ids).items() if text
+    }
+
+    if _use_postgres():
+        without = [video_id for video_id in video_ids if video_id not in transcripts]
+        if without:
+            VideoInsight.objects.filter(video_id__in=without).update(search_vector=_search_vector(""))
+        for video_id, transcript in transcripts.items():
+            VideoInsight.objects.filter(video_id=video_id).update(search_vector=_search_vector(transcript))
+        return
+
+    rows = VideoInsight.objects.filter(video_id__in=video_ids).values_list("video_id", "title", "description", "insight")
+    with connection.cursor() as cursor:
+        _ensure_fts_table(cursor)
+        placeholders = ",".join(["%s"] * len(video_ids))
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE video_id IN ({placeholders})", video_ids)
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (video_id, title, description, insight, transcript) VALUES (%s, %s, %s, %s, %s)",
+            [(*row, transcripts.get(row[0], "")) for row in rows],
+        )
+
+
+def keyword_filter(query):
+    """
+    A ``Q`` matching insights that contain ``query``. On Postgres its words go
+    through the full-text index; elsewhere it is a substring scan of the title
+    and description, which no index serves.
+    """
+    if _use_postgres():
+        return Q(search_vector=SearchQuery(query, search_type="websearch", config=settings.FULLTEXT_CONFIG))
+    return Q(title__icontains=query) | Q(description__icontains=query)
+
+
+def _fts_query(query):
+    # Quote every term so user input cannot hit FTS5 query syntax; terms are ANDed.
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def search_insights(query, limit=50):
+    """Returns stored insights matching ``query``, best match first, each with a ``rank`` attribute."""
+    if not query.split():
+        return []
+
+    if _use_postgres():
+        search_query = SearchQuery(query, search_type="websearch", config=settings.FULLTEXT_CONFIG)
+        return list(
+            VideoInsight.objects.filter(search_vector=search_query)
+            .annotate(rank=SearchRank(F("search_vector"), search_query))
+            .defer("search_vector")
+            .order_by("-rank", "-score")[:limit]
+        )
+
+    with connection.cursor() as cursor:
+        _ensure_fts_table(cursor)
+        weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+        cursor.execute(
+            # bm25() is lower for better matches; negate it so rank grows with relevance like ts_rank.
+            f"SELECT video_id, -bm25({FTS_TABLE}, {weights}) AS rank FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s ORDER BY rank DESC LIMIT %s",
+            [_fts_query(query), limit],
+        )
+        ranks = dict(cursor.fetchall())
+
+    rows = {row.video_id: row for row in VideoInsight.objects.filter(video_id__in=ranks).defer("search_vector")}
+    results = []
+    for video_id, rank in ranks.items():
+        if video_id in rows:
+            rows[video_id].rank = rank
+            results.append(rows[video_id])
+    return results
+
+
+def rebuild_search_index(batch_size=500):
+    """Re-indexes every stored video; returns how many were indexed."""
+    video_ids = list(VideoInsight.objects.order_by("pk").values_list("video_id", flat=True))
+    for start in range(0, len(video_ids), batch_size):
+        update_search_index(video_ids[start:start + batch_size])
+    return len(video_ids)
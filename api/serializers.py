@@ -1,6 +1,12 @@
 # api/serializers.py
+from django.conf import settings
 from rest_framework import serializers
 
+from api.models import SearchJob, VideoInsight, Watchlist
+from api.quota import max_candidates
+from api.scoring import SCORERS
+
+
 class VideoInsightSerializer(serializers.Serializer):
     video_id = serializers.CharField()
     title = serializers.CharField()
@@ -10,3 +16,58 @@ class VideoInsightSerializer(serializers.Serializer):
     score = serializers.FloatField()
     description = serializers.CharField()
     insight = serializers.CharField()
+    duplicate_of = serializers.CharField(allow_null=True, required=False)
+
+
+class StoredInsightSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VideoInsight
+        fields = ['video_id', 'title', 'channel_id', 'channel_title', 'views', 'subs', 'score',
+                  'insight', 'published_at', 'created_at']
+
+
+class RankedInsightSerializer(StoredInsightSerializer):
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(StoredInsightSerializer.Meta):
+        fields = StoredInsightSerializer.Meta.fields + ['rank']
+
+
+class SearchJobCreateSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=255)
+    max_results = serializers.IntegerField(min_value=1, max_value=settings.SEARCH_MAX_RESULTS, default=50)
+    candidates = serializers.IntegerField(min_value=1, required=False)
+    published_after = serializers.DateTimeField(required=False, allow_null=True)
+    scoring = serializers.ChoiceField(choices=sorted(SCORERS), required=False)
+
+
+class SearchJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SearchJob
+        fields = ['id', 'query', 'max_results', 'candidates', 'published_after', 'scoring', 'status',
+                  'progress', 'total', 'results', 'error', 'created_at', 'updated_at', 'finished_at']
+
+
+class WatchlistSerializer(serializers.ModelSerializer):
+    scoring = serializers.ChoiceField(choices=sorted(SCORERS), required=False, allow_blank=True)
+    max_results = serializers.IntegerField(min_value=1, max_value=settings.SEARCH_MAX_RESULTS, default=50)
+    candidates = serializers.IntegerField(min_value=1, required=False)
+    interval_minutes = serializers.IntegerField(default=60)
+
+    class Meta:
+        model = Watchlist
+        fields = ['id', 'query', 'max_results', 'candidates', 'scoring', 'interval_minutes', 'active',
+                  'published_after_mark', 'next_run_at', 'last_run_at', 'last_error', 'last_results', 'created_at']
+        read_only_fields = ['published_after_mark', 'next_run_at', 'last_run_at', 'last_error', 'last_results',
+                            'created_at']
+
+    def validate_interval_minutes(self, value):
+        if value < settings.WATCHLIST_MIN_INTERVAL_MINUTES:
+            raise serializers.ValidationError(f"Must be at least {settings.WATCHLIST_MIN_INTERVAL_MINUTES} minutes.")
+        return value
+
+    def validate(self, data):
+        max_results = data.get("max_results", getattr(self.instance, "max_results", 50))
+        candidates = data.get("candidates", getattr(self.instance, "candidates", max_results))
+        data["candidates"] = min(max(candidates, max_results), max_candidates())
+        return data
@@ -0,0 +1,91 @@
+# api/snapshots.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from api.models import VideoInsight, VideoStatSnapshot
+
+# Snapshots closer together than this are too noisy to derive a velocity from
+MIN_VELOCITY_SPAN = timedelta(hours=1)
+
+
+def record_snapshots(rows, ts=None, only_due=False):
+    """
+    Appends one snapshot per row; rows are dicts with ``video_id``, ``views``, ``likes`` and ``subs``.
+
+    With ``only_due``, videos whose latest snapshot is still inside their
+    tier's interval (see :func:`due_for_refresh`) are skipped, so repeated
+    searches do not pile up near-identical snapshots.
+    """
+    ts = ts or timezone.now()
+    if only_due:
+        due = set(due_for_refresh(ts).filter(video_id__in=[row["video_id"] for row in rows]))
+        rows = [row for row in rows if row["video_id"] in due]
+    VideoStatSnapshot.objects.bulk_create([
+        VideoStatSnapshot(
+            video_id=row["video_id"], ts=ts,
+            views=row.get("views", 0), likes=row.get("likes", 0), subs=row.get("subs", 0),
+        )
+        for row in rows
+    ])
+
+
+def due_for_refresh(now=None):
+    """
+    Tracked videos whose latest snapshot is older than their tier's interval.
+
+    Tiers come from ``SNAPSHOT_REFRESH_TIERS``, so young videos are refreshed
+    more often than old ones. Never-snapshotted videos come first, then the
+    most overdue. Returns a queryset of ``video_id`` values.
+    """
+    now = now or timezone.now()
+    latest = VideoStatSnapshot.objects.filter(video_id=OuterRef("video_id")).order_by("-ts").values("ts")[:1]
+
+    due = Q(last_ts__isnull=True)
+    younger_bound = None
+    for max_age, hours in settings.SNAPSHOT_REFRESH_TIERS:
+        band = Q(published_at__lte=now - timedelta(days=younger_bound)) if younger_bound is not None else Q()
+        if max_age is None:
+            band |= Q(published_at__isnull=True)
+        else:
+            band &= Q(published_at__gt=now - timedelta(days=max_age))
+        due |= band & Q(last_ts__lt=now - timedelta(hours=hours))
+        younger_bound = max_age
+
+    return (
+        VideoInsight.objects.annotate(last_ts=Subquery(latest))
+        .filter(due)
+        .order_by(F("last_ts").asc(nulls_first=True))
+        .values_list("video_id", flat=True)
+    )
+
+
+def load_velocities(video_ids, now=None):
+    """
+    Returns ``{video_id: views per day}`` over the last ``SNAPSHOT_VELOCITY_WINDOW`` days.
+
+    Only videos with two snapshots at least :data:`MIN_VELOCITY_SPAN` apart
+    inside the window get a value.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(days=settings.SNAPSHOT_VELOCITY_WINDOW)
+    rows = (
+        VideoStatSnapshot.objects.filter(video_id__in=video_ids, ts__gte=since)
+        .order_by("video_id", "ts")
+        .values_list("video_id", "ts", "views")
+    )
+
+    first, last = {}, {}
+    for video_id, ts, views in rows:
+        first.setdefault(video_id, (ts, views))
+        last[video_id] = (ts, views)
+
+    velocities = {}
+    for video_id, (first_ts, first_views) in first.items():
+        last_ts, last_views = last[video_id]
+        span = last_ts - first_ts
+        if span >= MIN_VELOCITY_SPAN:
+            velocities[video_id] = max(last_views - first_views, 0) / (span / timedelta(days=1))
+    return velocities
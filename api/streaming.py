@@ -0,0 +1,80 @@
+# api/streaming.py
+import json
+import logging
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from api.pipeline import save_results
+from api.serializers import VideoInsightSerializer
+
+logger = logging.getLogger(__name__)
+
+STREAM_CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def encode_event(fmt, event, data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder)
+    if fmt == "sse":
+        return f"event: {event}\ndata: {payload}\n\n"
+    return json.dumps({"event": event, "data": data}, cls=DjangoJSONEncoder) + "\n"
+
+
+def search_events(pipeline, ranked, model, on_complete=None):
+    """
+    Yields ``(event, data)`` pairs for a ranked search.
+
+    The ranked stats go out first, then one ``insight`` (or ``error``) event
+    per video as soon as it completes, then ``done``. If the client
+    disconnects half way, whatever finished is saved and the insights not
+    started yet are cancelled. A stream that runs to the end passes the
+    same payload the non-streaming search returns to ``on_complete``.
+    """
+    yield "ranked", {"results": [{**item, "rank": rank} for rank, item in enumerate(ranked)]}
+
+    completed = [None] * len(ranked)
+    try:
+        for index, result, error in pipeline.iter_completed(ranked):
+            video_id = ranked[index]["video_id"]
+            if error is not None:
+                logger.warning(f"Error processing video {video_id}: {error}")
+                yield "error", {"rank": index, "video_id": video_id, "error": "Failed to generate insight"}
+                continue
+            completed[index] = result
+            yield "insight", {
+                "rank": index, "video_id": video_id, "insight": result["insight"], "duplicate_of": result["duplicate_of"],
+            }
+    finally:
+        save_results([r for r in completed if r is not None], model)
+
+    if on_complete is not None:
+        on_complete([dict(row) for row in VideoInsightSerializer([r for r in completed if r is not None], many=True).data])
+    yield "done", {"count": sum(r is not None for r in completed)}
+
+
+def cached_search_events(payload):
+    """Replays a cached search payload as the events of a finished stream."""
+    yield "ranked", {"results": [
+        {**{k: v for k, v in row.items() if k not in ("insight", "duplicate_of")}, "rank": rank}
+        for rank, row in enumerate(payload)
+    ]}
+    for rank, row in enumerate(payload):
+        yield "insight", {
+            "rank": rank, "video_id": row["video_id"], "insight": row["insight"], "duplicate_of": row.get("duplicate_of"),
+        }
+    yield "done", {"count": len(payload)}
+
+
+def event_stream_response(events, fmt, headers=None):
+    response = StreamingHttpResponse(
+        (encode_event(fmt, event, data) for event, data in events),
+        content_type=STREAM_CONTENT_TYPES[fmt],
+        headers=headers,
+    )
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx-style proxies from buffering the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -1,3 +1,622 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import pyarrow.parquet as pq
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.db.models import QuerySet
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api import clients, openai_client, quota
+from api.clients import get_openai_client
+from api.dedup import near_duplicate_groups
+from api.insight_cache import load_cached_insights, store_insights
+from api.jobs import claim_job, requeue_stale_jobs
+from api.models import InsightCache, QuotaUsage, SearchJob, VideoInsight, VideoStatSnapshot, Watchlist
+from api.pipeline import InsightPipeline, collect_candidates, save_results
+from api.search_cache import get_cached_search, set_cached_search
+from api.search_index import search_insights
+from api.serializers import WatchlistSerializer
+from api.streaming import search_events
+from api.transcript_store import save_transcripts
+from api.views import published_after_param
+from api.watchlists import crawl
+from benchmarks.fake_servers import scaled_behaviours, start_server
+
+LOCMEM_SEARCH_CACHE = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "search": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests"},
+}
+
+
+class FakeAPIsMixin:
+    """Points YouTube and OpenAI at the local stand-ins from :mod:`benchmarks.fake_servers`."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server, cls.base_url = start_server(scaled_behaviours(0.0))
+        # Set in the environment so spawned worker processes see them too.
+        environ = mock.patch.dict(os.environ, {
+            "YOUTUBE_API_ENDPOINT": cls.base_url,
+            "YOUTUBE_API_KEY": "test",
+            "OPENAI_BASE_URL": f"{cls.base_url}/v1",
+            "OPENAI_API_KEY": "test",
+        })
+        environ.start()
+        cls.addClassCleanup(environ.stop)
+        endpoint = override_settings(YOUTUBE_API_ENDPOINT=cls.base_url)
+        endpoint.enable()
+        cls.addClassCleanup(endpoint.disable)
+        # Rebuild the process-wide clients against the stand-ins, and again afterwards.
+        clients._instances.clear()
+        cls.addClassCleanup(clients._instances.clear)
+        cls.addClassCleanup(cls.server.shutdown)
+
+    def search_ids(self, query, max_results):
+        response = requests.get(f"{self.base_url}/youtube/v3/search", params={"q": query, "maxResults": max_results})
+        return [item["id"]["videoId"] for item in response.json()["items"]]
+
+    def mark_transcripts_unavailable(self, video_ids):
+        # Keeps the pipeline away from youtube.com, which has no stand-in.
+        save_transcripts({video_id: ("unavailable", "en", "") for video_id in video_ids})
+
+
+class SearchJobPoolTests(FakeAPIsMixin, TransactionTestCase):
+    def test_queued_job_runs_in_worker_process(self):
+        self.mark_transcripts_unavailable(self.search_ids("pool test", 3))
+        job = SearchJob.objects.create(query="pool test", max_results=3, candidates=3)
+
+        call_command("run_search_jobs", "--once", "--workers", "1", stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done", job.error)
+        self.assertEqual(job.progress, 3)
+        self.assertEqual(len(job.results), 3)
+        self.assertEqual(VideoInsight.objects.count(), 3)
+
+
+class SearchJobLeaseTests(TestCase):
+    def test_running_jobs_with_a_lapsed_lease_are_requeued(self):
+        stale = SearchJob.objects.create(query="stale", status="running", progress=3)
+        alive = SearchJob.objects.create(query="alive", status="running")
+        lapsed = timezone.now() - timedelta(seconds=settings.SEARCH_JOB_LEASE_SECONDS + 1)
+        SearchJob.objects.filter(pk=stale.pk).update(updated_at=lapsed)
+
+        self.assertEqual(requeue_stale_jobs(), [stale.pk])
+        self.assertTrue(claim_job(stale.pk))
+
+        stale.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual((stale.status, stale.progress), ("running", 0))
+        self.assertEqual(alive.status, "running")
+
+    @mock.patch("api.views.submit_job")
+    def test_published_after_is_validated_and_normalized(self, submit_job):
+        url = "/api/videos/search/jobs/"
+        self.assertEqual(self.client.post(url, {"q": "news", "published_after": "last week"}).status_code, 400)
+
+        response = self.client.post(url, {"q": "news", "published_after": "2024-05-01T12:00:00+02:00"})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["published_after"], "2024-05-01T10:00:00Z")
+
+
+def ranked_videos(count, prefix="vid"):
+    return [
+        {
+            "video_id": f"{prefix}{i:03d}", "title": f"Video {i}", "description": f"About thing {i}",
+            "channel_id": f"UC{i:03d}", "channel_title": "Channel", "views": 1000 + i, "subs": 10, "score": 100.0 + i,
+        }
+        for i in range(count)
+    ]
+
+
+class StubYouTube:
+    def fetch_transcript(self, video_id):
+        return "unavailable", "en", ""
+
+
+class StubOpenAI:
+    """Counts insight calls; each takes ``delay`` seconds."""
+
+    model = "stub-model"
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def insight_key(self, title, description, transcript=""):
+        return f"{title}|{description}|{transcript}"
+
+    def generate_insight(self, title, description, transcript=""):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return f"Insight for {title}"
+
+
+class SearchStreamTests(TestCase):
+    def test_closing_the_stream_cancels_pending_insights(self):
+        llm = StubOpenAI(delay=0.05)
+        pipeline = InsightPipeline(StubYouTube(), llm, max_workers=4, llm_concurrency=1, dedup=False)
+        events = search_events(pipeline, ranked_videos(20), llm.model)
+
+        self.assertEqual(next(events)[0], "ranked")
+        self.assertEqual(next(events)[0], "insight")
+        events.close()
+
+        # Only calls already holding the LLM slot finish; the rest never start.
+        self.assertLessEqual(llm.calls, 2)
+        self.assertEqual(VideoInsight.objects.count(), 1)
+
+
+class OverlappingPagesYouTube:
+    """Returns two search pages that share two videos, as deep YouTube paging can."""
+
+    def reserve_search(self, max_results):
+        pass
+
+    def iter_search_videos(self, query, published_after=None, max_results=50, order=None):
+        videos = ranked_videos(4)
+        yield videos[:3]
+        yield videos[1:]
+
+    def get_video_stats(self, video_ids):
+        return {video_id: {"views": 1000, "likes": 10} for video_id in video_ids}
+
+    def get_channel_stats(self, channel_ids):
+        return {channel_id: {"subs": 10} for channel_id in channel_ids}
+
+
+class SaveResultsTests(TestCase):
+    def test_overlapping_search_pages_are_collected_once(self):
+        videos, video_stats, channel_stats = collect_candidates(OverlappingPagesYouTube(), "query", target=6)
+        self.assertEqual([v["video_id"] for v in videos], ["vid000", "vid001", "vid002", "vid003"])
+
+    def test_repeated_videos_are_upserted_once(self):
+        results = [
+            {**item, "insight": "Insight", "insight_key": item["video_id"], "insight_cached": False}
+            for item in ranked_videos(2)
+        ]
+        save_results([*results, {**results[0], "insight": "Repeated"}], "stub-model")
+
+        self.assertEqual(VideoInsight.objects.count(), 2)
+        self.assertEqual(VideoInsight.objects.get(video_id="vid000").insight, "Insight")
+
+    def test_rows_store_the_ratio_score_whatever_the_formula(self):
+        results = [
+            {**item, "score": 0.5, "insight": "Insight", "insight_key": item["video_id"], "insight_cached": False}
+            for item in ranked_videos(1)
+        ]
+        save_results(results, "stub-model")
+
+        # ranked_videos: 1000 views, 10 subscribers
+        self.assertEqual(VideoInsight.objects.get(video_id="vid000").score, 100.0)
+
+
+@override_settings(CACHES=LOCMEM_SEARCH_CACHE)
+class SearchCacheTests(FakeAPIsMixin, TestCase):
+    def stream(self, query):
+        response = self.client.get("/api/videos/search/", {"q": query, "max_results": 3, "stream": "ndjson"})
+        events = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        return response, events
+
+    def test_streamed_search_fills_the_cache_and_replays_it(self):
+        self.mark_transcripts_unavailable(self.search_ids("cached stream", 3))
+
+        first, live = self.stream("cached stream")
+        second, replayed = self.stream("cached stream")
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        insights = lambda events: sorted(e["data"]["insight"] for e in events if e["event"] == "insight")
+        self.assertEqual(insights(replayed), insights(live))
+        self.assertEqual(replayed[-1], {"event": "done", "data": {"count": 3}})
+
+    def test_payload_with_failed_insight_is_not_cached(self):
+        payload = [{"video_id": "vid000", "insight": "Error generating insight: timeout"}]
+
+        self.assertFalse(set_cached_search("search:failed", payload))
+        self.assertEqual(get_cached_search("search:failed"), (None, False))
+
+
+@override_settings(INSIGHT_TRANSCRIPT_TOKEN_BUDGET=50)
+class InsightBatchTests(FakeAPIsMixin, TestCase):
+    def test_write_submit_ingest_caches_under_the_online_key(self):
+        save_results([
+            {**item, "insight": "Error generating insight: timeout", "insight_key": None, "insight_cached": False}
+            for item in ranked_videos(2)
+        ], "gpt-4o")
+        long_transcript = " ".join(f"word{i}" for i in range(400))
+        save_transcripts({"vid000": ("fetched", "en", long_transcript), "vid001": ("fetched", "en", "Short one.")})
+        path = os.path.join(tempfile.mkdtemp(), "requests.jsonl")
+        self.addCleanup(os.remove, path)
+
+        call_command("insight_batch", "write", path, stdout=StringIO())
+        submitted = StringIO()
+        call_command("insight_batch", "submit", path, stdout=submitted)
+        batch_id = submitted.getvalue().split()[2]
+        call_command("insight_batch", "ingest", "--batch-id", batch_id, stdout=StringIO())
+
+        with open(path, encoding="utf-8") as f:
+            prompts = {json.loads(line)["custom_id"].split(":")[0]: json.loads(line)["body"]["messages"][-1]["content"]
+                       for line in f}
+        # The long transcript went out as its summary, the short one as is.
+        self.assertNotIn("word0 word1", prompts["vid000"])
+        self.assertIn("Short one.", prompts["vid001"])
+
+        llm = get_openai_client()
+        for video_id, transcript in (("vid000", long_transcript), ("vid001", "Short one.")):
+            row = VideoInsight.objects.get(video_id=video_id)
+            key = llm.insight_key(row.title, row.description, transcript)
+            self.assertEqual(InsightCache.objects.get(key=key).insight, row.insight)
+            self.assertFalse(row.insight.startswith("Error"))
+
+
+@override_settings(INSIGHT_TRANSCRIPT_TOKEN_BUDGET=50)
+class InsightPromptTests(TestCase):
+    def setUp(self):
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test"}):
+            self.llm = openai_client.OpenAIClient(model="stub-model")
+
+    def test_summary_prompt_only_keys_long_transcripts(self):
+        short, long = "A short transcript.", " ".join(f"word{i}" for i in range(400))
+        before = [self.llm.insight_key("Title", "Description", t) for t in (short, long)]
+        with mock.patch.object(openai_client, "SUMMARY_PROMPT_VERSION", "edited"):
+            after = [self.llm.insight_key("Title", "Description", t) for t in (short, long)]
+
+        self.assertEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
+
+    def test_editing_the_batch_template_keeps_single_insights(self):
+        store_insights([
+            {"video_id": "vid000", "insight_key": "single", "insight": "One"},
+            {"video_id": "vid001", "insight_key": "batched", "insight": "Two",
+             "prompt_version": openai_client.BATCH_PROMPT_VERSION},
+        ], "stub-model")
+
+        with mock.patch("api.insight_cache.PROMPT_VERSIONS", (openai_client.INSIGHT_PROMPT_VERSION, "edited")):
+            self.assertEqual(load_cached_insights(["vid000", "vid001"]), {"single": "One"})
+
+    def test_transcript_chunks_are_summarized_concurrently(self):
+        running, peak, lock = [0], [0], threading.Lock()
+
+        def summarize(chunk):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return "Summary."
+
+        with mock.patch.object(self.llm, "_summarize", summarize):
+            self.llm.fit_transcript(" ".join(f"word{i}" for i in range(4000)))
+
+        self.assertGreater(peak[0], 1)
+
+
+class SearchIndexTests(TestCase):
+    def save(self, insights):
+        save_results([
+            {**item, "insight": insight, "insight_key": item["video_id"], "insight_cached": False}
+            for item, insight in zip(ranked_videos(len(insights)), insights)
+        ], "stub-model")
+
+    def test_upsert_indexes_and_reindexes_videos(self):
+        save_transcripts({"vid001": ("fetched", "en", "We talk about sourdough starters.")})
+        self.save(["A clear promise about gardening.", "Cosy kitchen vibes."])
+
+        self.assertEqual([row.video_id for row in search_insights("gardening")], ["vid000"])
+        self.assertEqual([row.video_id for row in search_insights("sourdough")], ["vid001"])
+
+        self.save(["A clear promise about woodworking.", "Cosy kitchen vibes."])
+        self.assertEqual(search_insights("gardening"), [])
+        self.assertEqual([row.video_id for row in search_insights("woodworking")], ["vid000"])
+
+    def test_fulltext_endpoint_returns_best_match_first(self):
+        # Both titles say "Video"; only the second insight repeats it.
+        self.save(["Plain insight.", "A video that explains the video."])
+
+        response = self.client.get("/api/videos/fulltext/", {"q": "video"})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual([row["video_id"] for row in results], ["vid001", "vid000"])
+        self.assertGreater(results[0]["rank"], results[1]["rank"])
+
+        self.assertEqual(self.client.get("/api/videos/fulltext/", {"q": " "}).status_code, 400)
+        self.assertEqual(self.client.get("/api/videos/fulltext/", {"q": "video", "limit": "abc"}).status_code, 400)
+
+
+class WatchlistYouTube(StubYouTube):
+    """Serves the same three fresh videos to every search."""
+
+    def __init__(self, quota=None):
+        now = timezone.now()
+        self.videos = [
+            {**video, "published_at": (now - timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%SZ")}
+            for i, video in enumerate(ranked_videos(3))
+        ]
+
+    def reserve_search(self, max_results):
+        pass
+
+    def search_videos(self, query, published_after=None, max_results=50, order=None):
+        return self.videos
+
+    def get_video_stats(self, video_ids):
+        return {video_id: {"views": 1000, "likes": 10} for video_id in video_ids}
+
+    def get_channel_stats(self, channel_ids):
+        return {channel_id: {"subs": 10} for channel_id in channel_ids}
+
+
+class WatchlistCrawlTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="watcher@example.com", password="secret", first_name="W", last_name="L",
+        )
+
+    @mock.patch("api.watchlists.YouTubeClient", WatchlistYouTube)
+    def test_videos_ranked_out_last_run_are_not_analysed_again(self):
+        llm = StubOpenAI()
+        watchlist = Watchlist.objects.create(
+            user=self.user, query="news", max_results=1, candidates=5, next_run_at=timezone.now(),
+        )
+
+        with mock.patch("api.watchlists.get_openai_client", return_value=llm):
+            first = crawl(watchlist)
+            second = crawl(watchlist)
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(second, [])
+        self.assertEqual(llm.calls, 1)
+        self.assertEqual(sorted(watchlist.seen_video_ids), ["vid000", "vid001", "vid002"])
+
+    def test_max_results_is_capped(self):
+        serializer = WatchlistSerializer(data={"query": "news", "max_results": settings.SEARCH_MAX_RESULTS + 1})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("max_results", serializer.errors)
+
+
+class TokenBucketTests(TestCase):
+    def test_reserve_waits_off_a_deficit_or_sheds(self):
+        bucket = quota.TokenBucket(capacity=100, refill_rate=10)
+
+        self.assertEqual(bucket.reserve(100, max_wait=0), 0)
+        self.assertAlmostEqual(bucket.reserve(10, max_wait=5), 1.0, places=1)
+        self.assertIsNone(bucket.reserve(100, max_wait=5))
+
+    def test_refund_never_exceeds_capacity(self):
+        bucket = quota.TokenBucket(capacity=100, refill_rate=10)
+        bucket.reserve(20, max_wait=0)
+
+        bucket.refund(50)
+        self.assertLessEqual(bucket.available(), 100)
+
+
+@override_settings(YOUTUBE_DAILY_QUOTA=1000, YOUTUBE_QUOTA_MAX_WAIT=0)
+class QuotaSchedulerTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(quota, "bucket", quota.TokenBucket(capacity=500, refill_rate=1e-6))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reservation_is_shed_whole_and_unused_units_refunded(self):
+        scheduler = quota.QuotaScheduler()
+        scheduler.reserve(quota.search_cost(50))
+        scheduler.acquire("search.list")
+        with self.assertRaises(quota.QuotaExceeded):
+            quota.QuotaScheduler().reserve(quota.search_cost(200))
+
+        scheduler.flush()
+        # 100 units spent; the rest of the 102-unit reservation went back.
+        self.assertAlmostEqual(quota.bucket.available(), 400, places=0)
+
+    def test_daily_quota_counts_flushed_usage(self):
+        QuotaUsage.objects.create(day=quota.quota_day(), call_type="search.list", calls=9, units=950)
+
+        with self.assertRaises(quota.QuotaExceeded):
+            quota.QuotaScheduler.for_user(None).reserve(quota.search_cost(50))
+
+    def test_anonymous_usage_shares_one_ledger_row(self):
+        for _ in range(2):
+            scheduler = quota.QuotaScheduler()
+            scheduler.acquire("videos.list")
+            scheduler.flush()
+
+        row = QuotaUsage.objects.get(user=None, call_type="videos.list")
+        self.assertEqual((row.calls, row.units), (2, 2))
+
+    def test_flush_racing_another_process_adds_to_its_row(self):
+        scheduler = quota.QuotaScheduler()
+        scheduler.acquire("videos.list")
+        QuotaUsage.objects.create(day=scheduler.day, user=None, call_type="videos.list", calls=1, units=1)
+        update = QuerySet.update
+        calls = []
+
+        def update_before_the_row_landed(queryset, **fields):
+            # Our first update runs before the other process's insert commits.
+            calls.append(fields)
+            return 0 if len(calls) == 1 else update(queryset, **fields)
+
+        with mock.patch.object(QuerySet, "update", update_before_the_row_landed), \
+                mock.patch.object(QuotaUsage.objects, "create", side_effect=IntegrityError("duplicate key")):
+            scheduler.flush()
+
+        row = QuotaUsage.objects.get(user=None, call_type="videos.list")
+        self.assertEqual((row.calls, row.units), (2, 2))
+
+
+class RefreshYouTube:
+    def __init__(self, quota=None):
+        pass
+
+    def get_video_stats(self, video_ids):
+        return {video_id: {"views": 5000, "likes": 50, "channel_id": "UC000"} for video_id in video_ids}
+
+    def get_channel_stats(self, channel_ids):
+        return {channel_id: {"subs": 100} for channel_id in channel_ids}
+
+
+class SnapshotTests(TestCase):
+    def save(self):
+        save_results([
+            {**item, "insight": "Insight", "insight_key": item["video_id"], "insight_cached": False}
+            for item in ranked_videos(2)
+        ], "stub-model")
+
+    def test_repeated_searches_do_not_pile_up_snapshots(self):
+        self.save()
+        self.save()
+
+        self.assertEqual(VideoStatSnapshot.objects.count(), 2)
+
+    @mock.patch("api.management.commands.refresh_video_stats.YouTubeClient", RefreshYouTube)
+    def test_refresh_recomputes_the_stored_score(self):
+        self.save()
+        VideoStatSnapshot.objects.all().delete()
+
+        call_command("refresh_video_stats", stdout=StringIO())
+
+        row = VideoInsight.objects.get(video_id="vid000")
+        self.assertEqual((row.views, row.subs, row.score), (5000, 100, 50.0))
+
+
+REUPLOAD_BODY = (
+    "In this beginner friendly tutorial we install Python, write our first script, "
+    "and walk through variables, loops and functions step by step."
+)
+
+
+class DedupTests(TestCase):
+    def test_reuploads_with_matching_bodies_are_grouped(self):
+        groups = near_duplicate_groups([
+            ("Python tutorial for beginners", REUPLOAD_BODY),
+            ("Sourdough starter from scratch", "Flour, water and a week of patience."),
+            ("Python tutorial for beginners 2024", REUPLOAD_BODY),
+        ])
+        self.assertEqual(groups, {2: 0})
+
+    def test_similar_titles_without_bodies_are_not_grouped(self):
+        groups = near_duplicate_groups([
+            ("Python tutorial for beginners", ""),
+            ("Python tutorial for beginners 2024", ""),
+        ])
+        self.assertEqual(groups, {})
+
+    def test_pipeline_shares_the_leaders_insight(self):
+        llm = StubOpenAI()
+        items = ranked_videos(3)
+        items[0].update(title="Python tutorial for beginners", description=REUPLOAD_BODY)
+        items[2].update(title="Python tutorial for beginners 2024", description=REUPLOAD_BODY)
+
+        results = InsightPipeline(StubYouTube(), llm, max_workers=2, dedup=True).run(items)
+
+        self.assertEqual(llm.calls, 2)
+        self.assertEqual([r["duplicate_of"] for r in results], [None, None, "vid000"])
+        self.assertEqual(results[2]["insight"], results[0]["insight"])
+
+
+class SearchParameterTests(TestCase):
+    def test_published_after_is_normalized_to_rfc3339(self):
+        param = lambda value: published_after_param(RequestFactory().get("/", {"published_after": value}))
+
+        self.assertEqual(param("2024-05-01T12:00:00+02:00"), "2024-05-01T10:00:00Z")
+        self.assertEqual(param("2024-05-01T10:00:00"), "2024-05-01T10:00:00Z")
+        self.assertEqual(param("2024-05-01"), "2024-05-01T00:00:00Z")
+        self.assertIsNone(param(""))
+        for bad in ("last week", "2024-13-45"):
+            with self.assertRaises(ValueError):
+                param(bad)
+
+    def test_malformed_published_after_is_a_bad_request(self):
+        for url in ("/api/videos/search/", "/api/videos/search/async/"):
+            response = self.client.get(url, {"q": "news", "published_after": "last week"})
+            self.assertEqual(response.status_code, 400, url)
+            self.assertIn("published_after", response.json()["error"])
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        save_results([
+            {**item, "insight": f"Insight {i}", "insight_key": item["video_id"], "insight_cached": False}
+            for i, item in enumerate(ranked_videos(3))
+        ], "stub-model")
+        VideoInsight.objects.filter(video_id="vid002").update(channel_id="UCother")
+        self.api = APIClient()
+        self.api.force_authenticate(get_user_model().objects.create_user(
+            email="exporter@example.com", password="secret", first_name="E", last_name="X",
+        ))
+
+    def export(self, file_format, **params):
+        return self.api.get(f"/api/videos/export/{file_format}/", params)
+
+    def test_requires_authentication(self):
+        self.assertEqual(APIClient().get("/api/videos/export/csv/").status_code, 401)
+
+    def test_csv_streams_the_selected_columns_of_filtered_rows(self):
+        response = self.export("csv", fields="video_id,views", channel_id="UC000")
+
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode("utf-8"))))
+        self.assertEqual(rows, [["video_id", "views"], ["vid000", "1000"]])
+
+    def test_parquet_streams_every_row(self):
+        response = self.export("parquet", fields="video_id,score")
+
+        self.assertEqual(response.status_code, 200)
+        table = pq.read_table(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(table.column_names, ["video_id", "score"])
+        self.assertEqual(sorted(table.column("video_id").to_pylist()), ["vid000", "vid001", "vid002"])
+
+    def test_bad_fields_filters_and_formats_are_rejected(self):
+        self.assertEqual(self.export("csv", fields="video_id,password").status_code, 400)
+        self.assertEqual(self.export("csv", min_score="high").status_code, 400)
+        self.assertEqual(self.export("xlsx").status_code, 404)
+
+
+class BrowseTests(TestCase):
+    def setUp(self):
+        save_results([
+            {**item, "insight": "Insight", "insight_key": item["video_id"], "insight_cached": False}
+            for item in ranked_videos(7)
+        ], "stub-model")
+        # Every stored row gets the same score, so only the id tie-breaker orders them.
+        VideoInsight.objects.update(score=5.0)
+
+    def walk(self, params):
+        url, params, seen = "/api/videos/", {**params, "page_size": 2}, []
+        while url:
+            page = self.client.get(url, params).json()
+            seen += [row["video_id"] for row in page["results"]]
+            url, params = page["next"], None
+        return seen
+
+    def test_cursor_pages_over_equal_scores_have_no_duplicates_or_gaps(self):
+        expected = list(VideoInsight.objects.order_by("-id").values_list("video_id", flat=True))
+
+        self.assertEqual(self.walk({}), expected)
+        self.assertEqual(self.walk({"ordering": "score"}), expected[::-1])
+
+    def test_filters(self):
+        VideoInsight.objects.filter(video_id="vid003").update(score=9.0, channel_id="UCother", title="Sourdough basics")
+
+        self.assertEqual(self.walk({"min_score": 6}), ["vid003"])
+        self.assertEqual(self.walk({"channel_id": "UCother"}), ["vid003"])
+        self.assertEqual(self.walk({"q": "sourdough"}), ["vid003"])
+        self.assertEqual(self.client.get("/api/videos/", {"min_score": "high"}).status_code, 400)
@@ -0,0 +1,54 @@
+# api/transcript_store.py
+import gzip
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import Transcript
+
+
+def load_transcripts(video_ids):
+    """
+    Returns ``{video_id: text}`` for every video with a usable stored transcript.
+
+    Videos marked unavailable map to ``""`` until the marker is older than
+    ``TRANSCRIPT_RETRY_AFTER``, after which they are left out so the caller
+    fetches them again.
+    """
+    retry_cutoff = timezone.now() - timedelta(seconds=settings.TRANSCRIPT_RETRY_AFTER)
+    rows = Transcript.objects.filter(
+        Q(status="fetched") | Q(status="unavailable", fetched_at__gte=retry_cutoff),
+        video_id__in=video_ids,
+    )
+
+    preference = {language: rank for rank, language in enumerate(settings.TRANSCRIPT_LANGUAGES)}
+    best = {}
+    for row in rows:
+        current = best.get(row.video_id)
+        if current is None or preference.get(row.language, len(preference)) < preference.get(current.language, len(preference)):
+            best[row.video_id] = row
+    return {video_id: row.text for video_id, row in best.items()}
+
+
+def save_transcripts(fetched):
+    """Upserts ``{video_id: (status, language, text)}`` results, compressing the text."""
+    now = timezone.now()
+    rows = []
+    for video_id, (status, language, text) in fetched.items():
+        raw = text.encode("utf-8")
+        rows.append(Transcript(
+            video_id=video_id,
+            language=language,
+            status=status,
+            data=gzip.compress(raw) if raw else b"",
+            size=len(raw),
+            fetched_at=now,
+        ))
+    Transcript.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["video_id", "language"],
+        update_fields=["status", "data", "size", "fetched_at"],
+    )
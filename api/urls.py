@@ -1,6 +1,26 @@
 from django.urls import path
-from .views import YouTubeVideoSearchView
+from .views import (
+    AsyncYouTubeVideoSearchView,
+    QuotaUsageView,
+    SearchJobCreateView,
+    SearchJobDetailView,
+    VideoInsightExportView,
+    VideoInsightFullTextSearchView,
+    VideoInsightListView,
+    WatchlistDetailView,
+    WatchlistListCreateView,
+    YouTubeVideoSearchView,
+)
 
 urlpatterns = [
+    path('videos/', VideoInsightListView.as_view(), name='video-list'),
+    path('videos/export/<str:file_format>/', VideoInsightExportView.as_view(), name='video-export'),
+    path('videos/fulltext/', VideoInsightFullTextSearchView.as_view(), name='video-fulltext-search'),
     path('videos/search/', YouTubeVideoSearchView.as_view(), name='video-search'),
+    path('videos/search/async/', AsyncYouTubeVideoSearchView.as_view(), name='video-search-async'),
+    path('videos/search/jobs/', SearchJobCreateView.as_view(), name='video-search-job-create'),
+    path('videos/search/jobs/<uuid:id>/', SearchJobDetailView.as_view(), name='video-search-job-detail'),
+    path('watchlists/', WatchlistListCreateView.as_view(), name='watchlist-list'),
+    path('watchlists/<int:pk>/', WatchlistDetailView.as_view(), name='watchlist-detail'),
+    path('quota/', QuotaUsageView.as_view(), name='quota-usage'),
 ]
@@ -1,96 +1,458 @@
 # api/views.py
+from datetime import datetime, time
+from datetime import timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection
+from django.db.models import Sum
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views import View
+from rest_framework.generics import ListAPIView, ListCreateAPIView, RetrieveUpdateDestroyAPIView
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 import logging
 
-from api.youtube_client import YouTubeClient
-from api.openai_client import OpenAIClient
-from api.models import VideoInsight
-from api.serializers import VideoInsightSerializer
+from api.youtube_client import YouTubeClient, rfc3339
+from api.clients import get_openai_client
+from api.http import close_async_clients
+from api.pipeline import InsightPipeline, acollect_candidates, collect_candidates, rank_videos, save_results
+from api.export import EXPORT_FIELDS, EXPORT_FORMATS, ExportError, export_columns, export_rows, iter_export
+from api.jobs import submit_job
+from api import metrics
+from api.filters import StableOrderingFilter, VideoInsightFilter
+from api.models import QuotaUsage, SearchJob, VideoInsight, Watchlist
+from api.pagination import InsightCursorPagination
+from api.quota import QuotaExceeded, QuotaScheduler, max_candidates, quota_day, usage_for_day
+from api.quota import bucket as quota_bucket
+from api.scoring import SCORERS
+from api.search_cache import get_cached_search, refresh_in_background, search_cache_key, set_cached_search
+from api.search_index import search_insights
+from api.streaming import STREAM_CONTENT_TYPES, cached_search_events, event_stream_response, search_events
+from api.serializers import (
+    SearchJobCreateSerializer,
+    SearchJobSerializer,
+    RankedInsightSerializer,
+    StoredInsightSerializer,
+    VideoInsightSerializer,
+    WatchlistSerializer,
+)
 
-openai_client = OpenAIClient()
 logger = logging.getLogger(__name__)
 
 
+def jwt_user(request):
+    """Authenticates a plain Django request with the same JWT scheme as the DRF views."""
+    try:
+        auth = JWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return auth[0] if auth else None
+
+
+def search_payload(yt, query, published_after, max_results, candidates, scoring=None):
+    videos, video_stats, channel_stats = collect_candidates(yt, query, published_after, candidates)
+    results = rank_videos(videos, video_stats, channel_stats, max_results, scoring)
+
+    openai_client = get_openai_client()
+    processed = InsightPipeline(yt, openai_client).run(results)
+    save_results(processed, openai_client.model)
+
+    return [dict(row) for row in VideoInsightSerializer(processed, many=True).data]
+
+
+def refresh_search(user, query, published_after, max_results, candidates, scoring):
+    quota = QuotaScheduler.for_user(user)
+    try:
+        return search_payload(YouTubeClient(quota=quota), query, published_after, max_results, candidates, scoring)
+    finally:
+        quota.flush()
+
+
+def search_sizes(request):
+    """
+    ``(max_results, candidates)`` from the query string, clamped to
+    ``SEARCH_MAX_RESULTS`` and :func:`api.quota.max_candidates`. Raises
+    ``ValueError`` if either is not an integer.
+    """
+    max_results = min(max(int(request.GET.get("max_results", 50)), 1), settings.SEARCH_MAX_RESULTS)
+    candidates = int(request.GET.get("candidates", max_results))
+    return max_results, min(max(candidates, max_results), max_candidates())
+
+
+def sizes_error():
+    return {"error": "max_results and candidates must be integers"}
+
+
+def published_after_param(request):
+    """
+    The ``published_after`` parameter as the RFC 3339 string YouTube expects,
+    or ``None`` if absent; naive times are taken as UTC. Raises ``ValueError``
+    if it is not an ISO date or datetime.
+    """
+    value = request.GET.get("published_after")
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return rfc3339(parsed)
+
+
+def published_after_error():
+    return {"error": "published_after must be an ISO date or datetime, e.g. 2024-01-01T00:00:00Z"}
+
+
+def scoring_formula(request):
+    """The requested ranking formula, or ``None`` if it is not one of :data:`api.scoring.SCORERS`."""
+    formula = request.GET.get("scoring") or settings.SCORING_FORMULA
+    return formula if formula in SCORERS else None
+
+
+def scoring_error():
+    return {"error": f"scoring must be one of: {', '.join(sorted(SCORERS))}"}
+
+
 class YouTubeVideoSearchView(APIView):
     serializer_class = VideoInsightSerializer
 
     @extend_schema(
         parameters=[
             OpenApiParameter(name="q", description="Search keywords", required=True, type=str),
-            OpenApiParameter(name="max_results", description="Max number of results", required=False, type=int),
-            OpenApiParameter(name="published_after", description="ISO date string, e.g. 2024-01-01T00:00:00Z", required=False, type=str),
+            OpenApiParameter(name="max_results", description=f"Max number of results (default 50, at most {settings.SEARCH_MAX_RESULTS})", required=False, type=int),
+            OpenApiParameter(name="candidates", description="How many search results to scan before ranking (defaults to max_results)", required=False, type=int),
+            OpenApiParameter(name="published_after", description="ISO date or datetime, e.g. 2024-01-01T00:00:00Z (naive times are UTC)", required=False, type=str),
+            OpenApiParameter(name="scoring", description=f"Ranking formula: {', '.join(sorted(SCORERS))} (default: {settings.SCORING_FORMULA})", required=False, type=str),
+            OpenApiParameter(name="stream", description="Stream events as each insight completes: 'ndjson' or 'sse'", required=False, type=str),
         ],
         responses=VideoInsightSerializer(many=True),
         description="Searches YouTube videos and filters hidden gems (high views / low subs)."
     )
     def get(self, request):
         query = request.GET.get("q")
-        max_results = int(request.GET.get("max_results", 50))
+        scoring = scoring_formula(request)
+        stream = request.GET.get("stream")
 
         if not query:
             return Response({"error": "Missing required parameter: q"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            max_results, candidates = search_sizes(request)
+        except ValueError:
+            return Response(sizes_error(), status=status.HTTP_400_BAD_REQUEST)
+        try:
+            published_after = published_after_param(request)
+        except ValueError:
+            return Response(published_after_error(), status=status.HTTP_400_BAD_REQUEST)
+        if scoring is None:
+            return Response(scoring_error(), status=status.HTTP_400_BAD_REQUEST)
+        if stream and stream not in STREAM_CONTENT_TYPES:
+            return Response({"error": "stream must be 'ndjson' or 'sse'"}, status=status.HTTP_400_BAD_REQUEST)
 
+        user = request.user
+        cache_key = search_cache_key(query, published_after, max_results, candidates, scoring)
+        with metrics.span("cache.search"):
+            payload, stale = get_cached_search(cache_key)
+        if payload is not None:
+            if stale:
+                refresh_in_background(cache_key, lambda: refresh_search(
+                    user, query, published_after, max_results, candidates, scoring,
+                ))
+            headers = {"X-Cache": "STALE" if stale else "HIT"}
+            if stream:
+                return event_stream_response(cached_search_events(payload), stream, headers)
+            return Response(payload, status=status.HTTP_200_OK, headers=headers)
+
+        quota = QuotaScheduler.for_user(user)
         try:
-            yt = YouTubeClient()
-            videos = yt.search_videos(query, max_results=max_results)
-            video_ids = [v["video_id"] for v in videos]
-            channel_ids = [v["channel_id"] for v in videos]
-
-            video_stats = yt.get_video_stats(video_ids)
-            channel_stats = yt.get_channel_stats(channel_ids)
-
-            results = []
-            for v in videos:
-                vid = v["video_id"]
-                cid = v["channel_id"]
-                views = video_stats.get(vid, {}).get("views", 0)
-                subs = channel_stats.get(cid, {}).get("subs", 0) or 1
-                score = views / subs
-                description = video_stats.get(vid, {}).get("description", "")
-
-                results.append({
-                    "video_id": vid,
-                    "title": v["title"],
-                    "channel_id": cid,
-                    "channel_title": v["channel_title"],
-                    "views": views,
-                    "subs": subs,
-                    "score": round(score, 2),
-                    "description": description,
-                })
-
-            results = sorted(results, key=lambda x: x["score"], reverse=True)[:max_results]
-
-            for item in results:
-                try:
-                    transcript = yt.get_transcript(item["video_id"])
-                    full_description = f"{item['description']}\n\n{transcript}".strip()
-
-                    insight = openai_client.generate_insight(item["title"], full_description)
-                    item["insight"] = insight
-
-                    VideoInsight.objects.update_or_create(
-                        video_id=item["video_id"],
-                        defaults={
-                            "title": item["title"],
-                            "description": item["description"],
-                            "channel_title": item["channel_title"],
-                            "views": item["views"],
-                            "subs": item["subs"],
-                            "score": item["score"],
-                            "insight": insight,
-                        }
-                    )
-                except Exception as e:
-                    logger.warning(f"Error processing video {item['video_id']}: {e}")
-
-            video_objs = VideoInsight.objects.filter(video_id__in=[v["video_id"] for v in results])
-            serializer = VideoInsightSerializer(video_objs, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            yt = YouTubeClient(quota=quota)
+            if stream:
+                videos, video_stats, channel_stats = collect_candidates(yt, query, published_after, candidates)
+                results = rank_videos(videos, video_stats, channel_stats, max_results, scoring)
+                openai_client = get_openai_client()
+                pipeline = InsightPipeline(yt, openai_client)
+                events = search_events(
+                    pipeline, results, openai_client.model,
+                    on_complete=lambda payload: set_cached_search(cache_key, payload),
+                )
+                return event_stream_response(events, stream, {"X-Cache": "MISS"})
+
+            payload = search_payload(yt, query, published_after, max_results, candidates, scoring)
+            set_cached_search(cache_key, payload)
+            return Response(payload, status=status.HTTP_200_OK, headers={"X-Cache": "MISS"})
 
+        except QuotaExceeded as e:
+            logger.warning(f"Search rejected: {e}")
+            return Response({"error": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
         except Exception as e:
             logger.error(f"Search failed: {e}", exc_info=True)
             return Response({"error": "Internal server error"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        finally:
+            quota.flush()
+
+
+class AsyncYouTubeVideoSearchView(View):
+    """
+    Native async version of :class:`YouTubeVideoSearchView`.
+
+    All YouTube and OpenAI calls go through pooled ``httpx`` connections on the
+    event loop, so a single ASGI worker can serve many searches concurrently.
+    Under WSGI every request runs on its own short-lived loop, so the pool is
+    closed when the request ends and connections are not reused.
+    """
+
+    async def get(self, request):
+        query = request.GET.get("q")
+        scoring = scoring_formula(request)
+
+        if not query:
+            return JsonResponse({"error": "Missing required parameter: q"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            max_results, candidates = search_sizes(request)
+        except ValueError:
+            return JsonResponse(sizes_error(), status=status.HTTP_400_BAD_REQUEST)
+        try:
+            published_after = published_after_param(request)
+        except ValueError:
+            return JsonResponse(published_after_error(), status=status.HTTP_400_BAD_REQUEST)
+        if scoring is None:
+            return JsonResponse(scoring_error(), status=status.HTTP_400_BAD_REQUEST)
+
+        quota = await sync_to_async(lambda: QuotaScheduler.for_user(jwt_user(request)))()
+        try:
+            yt = YouTubeClient(quota=quota)
+            videos, video_stats, channel_stats = await acollect_candidates(yt, query, published_after, candidates)
+
+            results = await sync_to_async(rank_videos)(videos, video_stats, channel_stats, max_results, scoring)
+
+            openai_client = get_openai_client()
+            pipeline = InsightPipeline(yt, openai_client)
+            processed = await pipeline.arun(results)
+            await sync_to_async(save_results)(processed, openai_client.model)
+
+            serializer = VideoInsightSerializer(processed, many=True)
+            return JsonResponse(serializer.data, safe=False, status=status.HTTP_200_OK)
+
+        except QuotaExceeded as e:
+            logger.warning(f"Async search rejected: {e}")
+            return JsonResponse({"error": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        except Exception as e:
+            logger.error(f"Async search failed: {e}", exc_info=True)
+            return JsonResponse({"error": "Internal server error"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        finally:
+            await sync_to_async(quota.flush)()
+            if not isinstance(request, ASGIRequest):
+                await close_async_clients()
+
+
+class QuotaUsageView(APIView):
+    @extend_schema(description="Today's YouTube Data API quota usage, overall, per call type and for the current user.")
+    def get(self, request):
+        day = quota_day()
+        usage = QuotaUsage.objects.filter(day=day)
+        by_call_type = {
+            row["call_type"]: {"calls": row["calls"], "units": row["units"]}
+            for row in usage.values("call_type").annotate(calls=Sum("calls"), units=Sum("units"))
+        }
+        used = sum(row["units"] for row in by_call_type.values())
+
+        return Response({
+            "day": day,
+            "daily_limit": settings.YOUTUBE_DAILY_QUOTA,
+            "used": used,
+            "remaining": max(settings.YOUTUBE_DAILY_QUOTA - used, 0),
+            "user_used": usage_for_day(day, request.user) if request.user.is_authenticated else 0,
+            "by_call_type": by_call_type,
+            "bucket": {
+                "available": int(quota_bucket.available()),
+                "capacity": quota_bucket.capacity,
+            },
+        })
+
+
+class SearchJobCreateView(APIView):
+    serializer_class = SearchJobCreateSerializer
+
+    @extend_schema(
+        request=SearchJobCreateSerializer,
+        responses={202: SearchJobSerializer},
+        description="Queues a search to run in a background worker process; poll the returned job for progress."
+    )
+    def post(self, request):
+        serializer = SearchJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        max_results = data["max_results"]
+        candidates = min(max(data.get("candidates", max_results), max_results), max_candidates())
+        job = SearchJob.objects.create(
+            user=request.user if request.user.is_authenticated else None,
+            query=data["q"],
+            max_results=max_results,
+            candidates=candidates,
+            published_after=rfc3339(data["published_after"]) if data.get("published_after") else "",
+            scoring=data.get("scoring", settings.SCORING_FORMULA),
+        )
+        submit_job(job)
+        return Response(SearchJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class SearchJobDetailView(APIView):
+    serializer_class = SearchJobSerializer
+
+    @extend_schema(
+        responses=SearchJobSerializer,
+        description="Returns a search job's status, progress and the results processed so far."
+    )
+    def get(self, request, id):
+        user = request.user if request.user.is_authenticated else None
+        job = get_object_or_404(SearchJob, pk=id, user=user)
+        return Response(SearchJobSerializer(job).data)
+
+
+@extend_schema(description="Browses stored insights without calling YouTube or OpenAI; ordered by score (default) or recency.")
+class VideoInsightListView(ListAPIView):
+    serializer_class = StoredInsightSerializer
+    pagination_class = InsightCursorPagination
+    filter_backends = [DjangoFilterBackend, StableOrderingFilter]
+    filterset_class = VideoInsightFilter
+    ordering_fields = ["score", "created_at"]
+    ordering = ["-score"]
+
+    def get_queryset(self):
+        # Skip the description column: it can be large and the list does not show it.
+        return VideoInsight.objects.only(*StoredInsightSerializer.Meta.fields)
+
+
+class VideoInsightFullTextSearchView(APIView):
+    serializer_class = RankedInsightSerializer
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name="q", description="Search terms, matched against titles, descriptions, insights and transcripts", required=True, type=str),
+            OpenApiParameter(name="limit", description="Max number of results (default 50, at most 200)", required=False, type=int),
+        ],
+        responses=RankedInsightSerializer(many=True),
+        description="Full-text search over stored insights, best match first. Never calls YouTube or OpenAI."
+    )
+    def get(self, request):
+        query = request.GET.get("q", "")
+        try:
+            limit = min(max(int(request.GET.get("limit", 50)), 1), 200)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if not query.strip():
+            return Response({"error": "Missing required parameter: q"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(RankedInsightSerializer(search_insights(query, limit), many=True).data)
+
+
+class VideoInsightExportView(APIView):
+    # A full export is expensive, so it is not open to anonymous clients.
+    permission_classes = [IsAuthenticated]
+    # For the schema only; the filters are applied by api.export.export_rows.
+    queryset = VideoInsight.objects.none()
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = VideoInsightFilter
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name="fields", description=f"Comma-separated columns to export, from: {', '.join(EXPORT_FIELDS)}", required=False, type=str),
+        ],
+        filters=True,
+        responses={(200, "text/csv"): bytes, (200, "application/vnd.apache.parquet"): bytes},
+        description="Streams every stored insight matching the browse filters as CSV or Parquet, in id order."
+    )
+    def get(self, request, file_format):
+        if file_format not in EXPORT_FORMATS:
+            return Response({"error": "format must be 'csv' or 'parquet'"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            columns = export_columns(request.GET.get("fields"))
+            rows = export_rows(request.GET, columns)
+        except ExportError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        content_type, extension = EXPORT_FORMATS[file_format]
+        response = StreamingHttpResponse(iter_export(file_format, rows, columns), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="video_insights.{extension}"'
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class WatchlistQuerysetMixin:
+    serializer_class = WatchlistSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Watchlist.objects.filter(user=self.request.user).order_by("-created_at")
+
+    def check_unique_query(self, serializer, instance=None):
+        query = serializer.validated_data.get("query")
+        duplicate = self.get_queryset().filter(query=query)
+        if instance is not None:
+            duplicate = duplicate.exclude(pk=instance.pk)
+        if query is not None and duplicate.exists():
+            raise ValidationError({"query": "You already have a watchlist for this query."})
+
+
+@extend_schema(description="Your saved keyword watchlists. New ones are crawled on the next scheduler pass (see crawl_watchlists).")
+class WatchlistListCreateView(WatchlistQuerysetMixin, ListCreateAPIView):
+    def perform_create(self, serializer):
+        self.check_unique_query(serializer)
+        serializer.save(user=self.request.user, next_run_at=timezone.now())
+
+
+@extend_schema(description="One watchlist with the videos found by its latest run.")
+class WatchlistDetailView(WatchlistQuerysetMixin, RetrieveUpdateDestroyAPIView):
+    def perform_update(self, serializer):
+        self.check_unique_query(serializer, serializer.instance)
+        if serializer.validated_data.get("query", serializer.instance.query) != serializer.instance.query:
+            # A different query starts over from the initial lookback.
+            serializer.save(published_after_mark=None, next_run_at=timezone.now(), last_results=[])
+        else:
+            serializer.save()
+
+
+class MetricsView(View):
+    """Prometheus metrics of this worker process (see :mod:`api.metrics`)."""
+
+    def get(self, request):
+        allowed = settings.METRICS_ALLOWED_IPS
+        if "*" not in allowed and request.META.get("REMOTE_ADDR") not in allowed:
+            return HttpResponseForbidden()
+        return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class LivenessView(View):
+    """The process is up and serving requests. Checks nothing else, so a database outage does not restart workers."""
+
+    def get(self, request):
+        return JsonResponse({"status": "ok"})
+
+
+class ReadinessView(View):
+    """The process can serve traffic: its database connection answers."""
+
+    def get(self, request):
+        try:
+            with metrics.span("db.ping"), connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except Exception as e:
+            logger.warning(f"Readiness check failed: {e}")
+            return JsonResponse({"status": "unavailable", "database": "error"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return JsonResponse({"status": "ok", "database": "ok"})
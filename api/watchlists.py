@@ -0,0 +1,122 @@
+# api/watchlists.py
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.clients import get_openai_client
+from api.models import Watchlist
+from api.pipeline import InsightPipeline, rank_videos, save_results, unique_videos
+from api.quota import QuotaExceeded, QuotaScheduler
+from api.serializers import VideoInsightSerializer
+from api.youtube_client import YouTubeClient
+
+logger = logging.getLogger(__name__)
+
+
+def due_watchlists(now=None, limit=None):
+    """Active watchlists whose next run is due, most overdue first."""
+    due = Watchlist.objects.filter(active=True, next_run_at__lte=now or timezone.now()).order_by("next_run_at")
+    return due[:limit] if limit else due
+
+
+def next_run(watchlist, now):
+    # +-10% jitter keeps watchlists created together from firing together forever.
+    minutes = watchlist.interval_minutes * random.uniform(0.9, 1.1)
+    return now + timedelta(minutes=minutes)
+
+
+def overlap_start(mark):
+    return mark - timedelta(minutes=settings.WATCHLIST_OVERLAP_MINUTES)
+
+
+def search_window_start(watchlist, now):
+    """
+    Where this run's search starts: the high-water mark minus a small overlap
+    (search indexing lags behind publishing), or a lookback for a first run.
+    """
+    if watchlist.published_after_mark is None:
+        start = now - timedelta(hours=settings.WATCHLIST_INITIAL_LOOKBACK_HOURS)
+    else:
+        start = overlap_start(watchlist.published_after_mark)
+    return start.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def seen_in_overlap(videos, mark):
+    """Ids of the videos the next run's search can return again: those in its overlap window."""
+    if mark is None:
+        return []
+    start = overlap_start(mark)
+    return [
+        v["video_id"] for v in videos
+        if not v.get("published_at") or parse_datetime(v["published_at"]) >= start
+    ]
+
+
+def crawl(watchlist, now=None):
+    """
+    Runs one incremental crawl: searches newest-first from the high-water
+    mark, drops the videos the previous run already saw (whether or not they
+    ranked), then ranks and analyses only the new ones. Returns the processed
+    results; the watchlist is updated and saved.
+
+    If the YouTube quota runs short the run is retried after
+    ``WATCHLIST_RETRY_MINUTES`` without moving the mark.
+    """
+    now = now or timezone.now()
+    quota = QuotaScheduler.for_user(watchlist.user)
+    yt = YouTubeClient(quota=quota)
+    try:
+        yt.reserve_search(watchlist.candidates)
+        videos = unique_videos(yt.search_videos(
+            watchlist.query, search_window_start(watchlist, now), watchlist.candidates, order="date",
+        ))
+        if len(videos) >= watchlist.candidates:
+            logger.warning(
+                f"Watchlist {watchlist.pk} hit its {watchlist.candidates}-candidate cap; "
+                f"older new videos were skipped, consider a shorter interval"
+            )
+
+        seen = set(watchlist.seen_video_ids)
+        new = [v for v in videos if v["video_id"] not in seen]
+
+        processed = []
+        if new:
+            video_stats = yt.get_video_stats([v["video_id"] for v in new])
+            channel_stats = yt.get_channel_stats(list({v["channel_id"] for v in new}))
+            results = rank_videos(new, video_stats, channel_stats, watchlist.max_results, watchlist.scoring or None)
+
+            openai_client = get_openai_client()
+            processed = InsightPipeline(yt, openai_client).run(results)
+            save_results(processed, openai_client.model)
+    except QuotaExceeded as e:
+        logger.warning(f"Watchlist {watchlist.pk} postponed: {e}")
+        watchlist.last_error = str(e)
+        watchlist.next_run_at = now + timedelta(minutes=settings.WATCHLIST_RETRY_MINUTES)
+        watchlist.save(update_fields=["last_error", "next_run_at"])
+        return []
+    except Exception as e:
+        logger.error(f"Watchlist {watchlist.pk} crawl failed: {e}", exc_info=True)
+        watchlist.last_error = str(e)
+        watchlist.next_run_at = next_run(watchlist, now)
+        watchlist.save(update_fields=["last_error", "next_run_at"])
+        return []
+    finally:
+        quota.flush()
+
+    published = [parse_datetime(v["published_at"]) for v in videos if v.get("published_at")]
+    marks = [m for m in [watchlist.published_after_mark, *published] if m is not None]
+    watchlist.published_after_mark = max(marks) if marks else None
+    # A quiet run keeps the previous ids: the window has not moved.
+    watchlist.seen_video_ids = seen_in_overlap(videos, watchlist.published_after_mark) or watchlist.seen_video_ids
+    watchlist.last_run_at = now
+    watchlist.next_run_at = next_run(watchlist, now)
+    watchlist.last_error = ""
+    watchlist.last_results = [dict(row) for row in VideoInsightSerializer(processed, many=True).data]
+    watchlist.save(update_fields=[
+        "published_after_mark", "seen_video_ids", "last_run_at", "next_run_at", "last_error", "last_results",
+    ])
+    return processed
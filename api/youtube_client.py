@@ -1,24 +1,227 @@
 # api/youtube_client.py
+import asyncio
 import os
-from googleapiclient.discovery import build
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from api import metrics
+from api.channel_store import load_fresh_channel_stats, save_channel_stats
+from api.clients import get_transcript_api, get_youtube_service, pooled_http
+from api.http import get_async_http_client
+from api.quota import search_cost
 
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
+YOUTUBE_API_ROOT = "https://www.googleapis.com"
+# videos().list and channels().list accept at most this many ids per call
+MAX_IDS_PER_CALL = 50
+
+
+def chunked(items, size=MAX_IDS_PER_CALL):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def rfc3339(value):
+    """An aware datetime in the ``2024-01-01T00:00:00Z`` form the Data API expects."""
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
 class YouTubeClient:
-    def __init__(self):
-        self.youtube = build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
-
-    def search_videos(self, query, published_after=None, max_results=50):
-        search_response = self.youtube.search().list(
-            q=query,
-            part="id,snippet",
-            maxResults=max_results,
-            type="video",
-            publishedAfter=published_after,
-        ).execute()
+    """
+    Per-request facade over the process-wide API clients in :mod:`api.clients`.
+
+    Cheap to create: it only carries the caller's quota scheduler.
+    """
+
+    def __init__(self, quota=None):
+        self.quota = quota
+
+    @property
+    def youtube(self):
+        return get_youtube_service()
+
+    def _execute(self, request, call_type):
+        if self.quota is not None:
+            with metrics.span("quota.wait"):
+                self.quota.acquire(call_type)
+        with pooled_http() as http, metrics.span(f"youtube.{call_type}"):
+            return request.execute(http=http)
+
+    def reserve_search(self, max_results):
+        """Admits the quota of a whole search (its pages and their stats) before its first call."""
+        if self.quota is not None:
+            with metrics.span("quota.wait"):
+                self.quota.reserve(search_cost(max_results))
+
+    def _fetch_chunks(self, fetch, ids):
+        """Runs ``fetch`` over 50-id chunks, several in flight at once, and merges the dicts."""
+        chunks = list(chunked(list(dict.fromkeys(ids))))
+        if len(chunks) <= 1:
+            responses = [fetch(chunk) for chunk in chunks]
+        else:
+            workers = min(len(chunks), settings.YOUTUBE_STATS_CONCURRENCY)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="yt-stats") as pool:
+                responses = list(pool.map(metrics.bind(fetch), chunks))
+
+        stats = {}
+        for response in responses:
+            stats.update(response)
+        return stats
+
+    def iter_search_videos(self, query, published_after=None, max_results=50, order=None):
+        """
+        Yields search results page by page until ``max_results`` videos or the last page.
+
+        ``order`` is the API's sort order (``"relevance"`` when omitted, ``"date"`` for newest first).
+        """
+        page_token = None
+        remaining = max_results
+        while remaining > 0:
+            search_response = self._execute(self.youtube.search().list(
+                q=query,
+                part="id,snippet",
+                maxResults=min(remaining, MAX_IDS_PER_CALL),
+                type="video",
+                publishedAfter=published_after,
+                order=order,
+                pageToken=page_token,
+            ), "search.list")
+            videos = self._parse_search(search_response)[:remaining]
+            if videos:
+                yield videos
+            remaining -= len(videos)
+            page_token = search_response.get("nextPageToken")
+            if not page_token or not videos:
+                break
+
+    def search_videos(self, query, published_after=None, max_results=50, order=None):
+        return [v for page in self.iter_search_videos(query, published_after, max_results, order) for v in page]
+
+    def _fetch_video_stats(self, video_ids):
+        response = self._execute(self.youtube.videos().list(
+            part="statistics,snippet",
+            id=",".join(video_ids)
+        ), "videos.list")
+        return self._parse_video_stats(response)
+
+    def get_video_stats(self, video_ids):
+        return self._fetch_chunks(self._fetch_video_stats, video_ids)
+
+    def _fetch_channel_stats(self, channel_ids):
+        response = self._execute(self.youtube.channels().list(
+            part="statistics",
+            id=",".join(channel_ids)
+        ), "channels.list")
+        return self._parse_channel_stats(response)
+
+    def get_channel_stats(self, channel_ids):
+        """Serves fresh channels from the store and fetches only the stale or missing ones."""
+        stats = load_fresh_channel_stats(channel_ids)
+        missing = [cid for cid in channel_ids if cid not in stats]
+
+        fetched = self._fetch_chunks(self._fetch_channel_stats, missing)
+        save_channel_stats(fetched)
+        return {**stats, **fetched}
 
+    def fetch_transcript(self, video_id):
+        """
+        Returns ``(status, language, text)`` for a video's transcript.
+
+        ``status`` is ``"fetched"`` or ``"unavailable"`` (worth remembering), or
+        ``None`` when the fetch failed for a reason that may go away.
+        """
+        from youtube_transcript_api import NoTranscriptFound, TranscriptsDisabled, VideoUnavailable
+
+        with metrics.span("youtube.transcript") as span:
+            try:
+                transcript = get_transcript_api().fetch(video_id, languages=settings.TRANSCRIPT_LANGUAGES)
+                return "fetched", transcript.language_code, " ".join(snippet.text for snippet in transcript)
+            except (TranscriptsDisabled, NoTranscriptFound, VideoUnavailable):
+                return "unavailable", settings.TRANSCRIPT_LANGUAGES[0], ""
+            except Exception:
+                span.failed = True
+                return None, None, ""
+
+    def get_transcript(self, video_id):
+        return self.fetch_transcript(video_id)[2]
+
+    # --- Async variants over the pooled httpx client ---
+
+    async def _aget(self, resource, params):
+        if self.quota is not None:
+            with metrics.span("quota.wait"):
+                await self.quota.aacquire(f"{resource}.list")
+        with metrics.span(f"youtube.{resource}.list"):
+            response = await get_async_http_client().get(
+                f"{(settings.YOUTUBE_API_ENDPOINT or YOUTUBE_API_ROOT).rstrip('/')}/youtube/v3/{resource}",
+                params={**params, "key": YOUTUBE_API_KEY},
+            )
+            response.raise_for_status()
+            return response.json()
+
+    async def areserve_search(self, max_results):
+        if self.quota is not None:
+            with metrics.span("quota.wait"):
+                await self.quota.areserve(search_cost(max_results))
+
+    async def _afetch_chunks(self, resource, params, ids, parse):
+        responses = await asyncio.gather(*(
+            self._aget(resource, {**params, "id": ",".join(chunk)})
+            for chunk in chunked(list(dict.fromkeys(ids)))
+        ))
+        stats = {}
+        for response in responses:
+            stats.update(parse(response))
+        return stats
+
+    async def aiter_search_videos(self, query, published_after=None, max_results=50, order=None):
+        page_token = None
+        remaining = max_results
+        while remaining > 0:
+            params = {"q": query, "part": "id,snippet", "maxResults": min(remaining, MAX_IDS_PER_CALL), "type": "video"}
+            if published_after:
+                params["publishedAfter"] = published_after
+            if order:
+                params["order"] = order
+            if page_token:
+                params["pageToken"] = page_token
+            search_response = await self._aget("search", params)
+            videos = self._parse_search(search_response)[:remaining]
+            if videos:
+                yield videos
+            remaining -= len(videos)
+            page_token = search_response.get("nextPageToken")
+            if not page_token or not videos:
+                break
+
+    async def asearch_videos(self, query, published_after=None, max_results=50, order=None):
+        return [v async for page in self.aiter_search_videos(query, published_after, max_results, order) for v in page]
+
+    async def aget_video_stats(self, video_ids):
+        return await self._afetch_chunks("videos", {"part": "statistics,snippet"}, video_ids, self._parse_video_stats)
+
+    async def aget_channel_stats(self, channel_ids):
+        stats = await sync_to_async(load_fresh_channel_stats)(channel_ids)
+        missing = [cid for cid in channel_ids if cid not in stats]
+
+        fetched = await self._afetch_chunks("channels", {"part": "statistics"}, missing, self._parse_channel_stats)
+        await sync_to_async(save_channel_stats)(fetched)
+        return {**stats, **fetched}
+
+    async def afetch_transcript(self, video_id):
+        # youtube_transcript_api has no async interface; keep it off the event loop.
+        return await sync_to_async(self.fetch_transcript, thread_sensitive=False)(video_id)
+
+    async def aget_transcript(self, video_id):
+        return (await self.afetch_transcript(video_id))[2]
+
+    # --- Response parsing shared by the sync and async paths ---
+
+    @staticmethod
+    def _parse_search(search_response):
         videos = []
         for item in search_response.get("items", []):
             video_id = item["id"]["videoId"]
@@ -30,15 +233,12 @@ class YouTubeClient:
                 "title": title,
                 "channel_id": channel_id,
                 "channel_title": channel_title,
+                "published_at": item["snippet"].get("publishedAt", ""),
             })
         return videos
 
-    def get_video_stats(self, video_ids):
-        response = self.youtube.videos().list(
-            part="statistics,snippet",
-            id=",".join(video_ids)
-        ).execute()
-
+    @staticmethod
+    def _parse_video_stats(response):
         stats = {}
         for item in response.get("items", []):
             video_id = item["id"]
@@ -46,15 +246,12 @@ class YouTubeClient:
                 "views": int(item["statistics"].get("viewCount", 0)),
                 "likes": int(item["statistics"].get("likeCount", 0)),
                 "description": item["snippet"].get("description", ""),
+                "channel_id": item["snippet"].get("channelId", ""),
             }
         return stats
 
-    def get_channel_stats(self, channel_ids):
-        response = self.youtube.channels().list(
-            part="statistics",
-            id=",".join(channel_ids)
-        ).execute()
-
+    @staticmethod
+    def _parse_channel_stats(response):
         stats = {}
         for item in response.get("items", []):
             channel_id = item["id"]
@@ -62,12 +259,3 @@ class YouTubeClient:
                 "subs": int(item["statistics"].get("subscriberCount", 0))
             }
         return stats
-
-    def get_transcript(self, video_id):
-        try:
-            transcript = YouTubeTranscriptApi.fetch(video_id)
-            return " ".join([t["text"] for t in transcript])
-        except (TranscriptsDisabled, NoTranscriptFound):
-            return ""
-        except Exception:
-            return ""
@@ -0,0 +1,48 @@
+# benchmarks/compare.py
+"""
+Compares two benchmark result files stage by stage.
+
+    python benchmarks/compare.py benchmarks/results/OLD.json benchmarks/results/NEW.json
+
+Exits with status 1 if any stage's p95 got slower by more than --threshold percent.
+"""
+import argparse
+import json
+import sys
+
+
+def load_runs(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data, {(run["max_results"], run["concurrency"]): run for run in data["runs"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed p95 slowdown in percent.")
+    args = parser.parse_args()
+
+    old, old_runs = load_runs(args.baseline)
+    new, new_runs = load_runs(args.candidate)
+    print(f"{old['commit']} -> {new['commit']}")
+
+    regressions = 0
+    for level in sorted(old_runs.keys() & new_runs.keys()):
+        print(f"max_results={level[0]} concurrency={level[1]}")
+        old_stages, new_stages = old_runs[level]["stages"], new_runs[level]["stages"]
+        for stage in sorted(old_stages.keys() & new_stages.keys()):
+            before, after = old_stages[stage]["p95_ms"], new_stages[stage]["p95_ms"]
+            change = (after - before) / before * 100 if before else 0.0
+            flag = ""
+            if change > args.threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"    {stage:<14} p95 {before:>9.1f}ms -> {after:>9.1f}ms ({change:+.1f}%){flag}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
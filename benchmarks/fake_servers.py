@@ -0,0 +1,274 @@
+# benchmarks/fake_servers.py
+"""
+Local stand-ins for the YouTube Data API, transcripts and OpenAI chat
+completions, plus the OpenAI files and Batch API.
+
+Every YouTube, transcript and chat route sleeps for a log-normally
+distributed latency and fails with a configurable probability, so the
+benchmark sees realistic tails without any network access or API keys.
+Batches complete as soon as they are created.
+"""
+import hashlib
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from youtube_transcript_api import FetchedTranscript, FetchedTranscriptSnippet, TranscriptsDisabled
+
+WORDS = (
+    "how why best guide secret easy fast budget travel cooking python music workout review "
+    "reaction challenge story tips hacks beginner pro vlog build science history money"
+).split()
+SEARCH_PAGES = 40
+CHANNEL_POOL = 300
+UNAVAILABLE_TRANSCRIPT_RATE = 0.1
+
+
+class Behaviour:
+    """Latency (log-normal around ``median_ms``) and failure rate of one route."""
+
+    def __init__(self, median_ms, sigma=0.5, failure_rate=0.0):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.failure_rate = failure_rate
+
+    def wait(self):
+        time.sleep(self.median_ms * math.exp(random.gauss(0, self.sigma)) / 1000)
+        return random.random() >= self.failure_rate
+
+
+DEFAULT_BEHAVIOURS = {
+    "search": Behaviour(250),
+    "videos": Behaviour(80),
+    "channels": Behaviour(80),
+    "transcripts": Behaviour(400, sigma=0.7),
+    "chat": Behaviour(1200, sigma=0.6),
+}
+
+
+def scaled_behaviours(latency_scale=1.0, failure_rate=0.0):
+    return {
+        route: Behaviour(b.median_ms * latency_scale, b.sigma, failure_rate)
+        for route, b in DEFAULT_BEHAVIOURS.items()
+    }
+
+
+def _seeded(*parts):
+    return random.Random(hashlib.sha1(":".join(map(str, parts)).encode()).hexdigest())
+
+
+def _video_id(query, page, position):
+    return hashlib.sha1(f"{query}:{page}:{position}".encode()).hexdigest()[:11]
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    behaviours = DEFAULT_BEHAVIOURS
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload):
+        self._reply_bytes(status, json.dumps(payload).encode(), "application/json")
+
+    def _reply_bytes(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self, route, handler, *args):
+        if not self.behaviours[route].wait():
+            return self._reply(500, {"error": {"message": f"injected {route} failure"}})
+        return self._reply(*handler(*args))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path == "/youtube/v3/search":
+            return self._route("search", self._search, params)
+        if url.path == "/youtube/v3/videos":
+            return self._route("videos", self._videos, params)
+        if url.path == "/youtube/v3/channels":
+            return self._route("channels", self._channels, params)
+        if url.path.startswith("/transcripts/"):
+            return self._route("transcripts", self._transcript, url.path.rsplit("/", 1)[1])
+        match = re.fullmatch(r"/v1/files/([^/]+)/content", url.path)
+        if match and match.group(1) in self.server.files:
+            return self._reply_bytes(200, self.server.files[match.group(1)], "application/jsonl")
+        match = re.fullmatch(r"/v1/batches/([^/]+)", url.path)
+        if match and match.group(1) in self.server.batches:
+            return self._reply(200, self.server.batches[match.group(1)])
+        return self._reply(404, {"error": "unknown route"})
+
+    def do_POST(self):
+        raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = urlparse(self.path).path
+        if path == "/v1/files":
+            return self._reply(200, self._upload(raw))
+        body = json.loads(raw or b"{}")
+        if path.endswith("/chat/completions"):
+            return self._route("chat", self._chat, body)
+        if path == "/v1/batches":
+            return self._reply(*self._create_batch(body))
+        return self._reply(404, {"error": "unknown route"})
+
+    def _store_file(self, content, filename, purpose):
+        file_id = f"file-{next(self.server.ids)}"
+        self.server.files[file_id] = content
+        return {
+            "id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+            "filename": filename, "purpose": purpose, "status": "processed",
+        }
+
+    def _upload(self, raw):
+        form = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + raw
+        )
+        fields = {part.get_param("name", header="content-disposition"): part for part in form.iter_parts()}
+        upload = fields["file"]
+        return self._store_file(
+            upload.get_payload(decode=True), upload.get_filename() or "upload.jsonl",
+            fields["purpose"].get_content().strip() if "purpose" in fields else "batch",
+        )
+
+    def _create_batch(self, body):
+        """Runs every request of the input file through the chat stand-in at once."""
+        content = self.server.files.get(body.get("input_file_id"))
+        if content is None:
+            return 404, {"error": {"message": "No such file"}}
+        lines = []
+        for line in content.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            status, response = self._chat(request["body"])
+            lines.append(json.dumps({
+                "id": f"batch_req_{next(self.server.ids)}",
+                "custom_id": request["custom_id"],
+                "response": {"status_code": status, "request_id": "req-bench", "body": response},
+                "error": None,
+            }))
+        output = self._store_file(("\n".join(lines) + "\n").encode("utf-8"), "batch_output.jsonl", "batch_output")
+        batch_id = f"batch_{next(self.server.ids)}"
+        now = int(time.time())
+        self.server.batches[batch_id] = {
+            "id": batch_id, "object": "batch", "endpoint": body.get("endpoint"),
+            "input_file_id": body["input_file_id"], "completion_window": body.get("completion_window", "24h"),
+            "status": "completed", "output_file_id": output["id"], "created_at": now, "completed_at": now,
+            "request_counts": {"total": len(lines), "completed": len(lines), "failed": 0},
+        }
+        return 200, self.server.batches[batch_id]
+
+    @staticmethod
+    def _search(params):
+        query = params.get("q", "")
+        page = int(params.get("pageToken") or 0)
+        items = []
+        for position in range(int(params.get("maxResults", 5))):
+            video_id = _video_id(query, page, position)
+            rng = _seeded(video_id)
+            items.append({
+                "id": {"kind": "youtube#video", "videoId": video_id},
+                "snippet": {
+                    "title": f"{_text(rng, 6)} {video_id}",
+                    "channelId": f"UC{rng.randrange(CHANNEL_POOL):06d}",
+                    "channelTitle": "Bench channel",
+                    "publishedAt": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00Z",
+                },
+            })
+        response = {"items": items}
+        if page + 1 < SEARCH_PAGES:
+            response["nextPageToken"] = str(page + 1)
+        return 200, response
+
+    @staticmethod
+    def _videos(params):
+        items = []
+        for video_id in filter(None, params.get("id", "").split(",")):
+            rng = _seeded(video_id)
+            items.append({
+                "id": video_id,
+                "statistics": {"viewCount": str(rng.randint(100, 5_000_000)), "likeCount": str(rng.randint(0, 50_000))},
+                "snippet": {"description": _text(rng, 60), "channelId": f"UC{rng.randrange(CHANNEL_POOL):06d}"},
+            })
+        return 200, {"items": items}
+
+    @staticmethod
+    def _channels(params):
+        items = [
+            {"id": channel_id, "statistics": {"subscriberCount": str(_seeded(channel_id).randint(10, 2_000_000))}}
+            for channel_id in filter(None, params.get("id", "").split(","))
+        ]
+        return 200, {"items": items}
+
+    @staticmethod
+    def _transcript(video_id):
+        rng = _seeded("transcript", video_id)
+        if rng.random() < UNAVAILABLE_TRANSCRIPT_RATE:
+            return 404, {"error": "transcripts disabled"}
+        return 200, {"language_code": "en", "text": _text(rng, rng.randint(200, 3000))}
+
+    @staticmethod
+    def _chat(body):
+        messages = body.get("messages", [])
+        if body.get("response_format", {}).get("type") == "json_object":
+            video_ids = re.findall(r"^video_id: (\S+)$", messages[-1]["content"], re.MULTILINE)
+            content = json.dumps({"insights": {video_id: "Batched benchmark insight." for video_id in video_ids}})
+        else:
+            content = "Strong hook and a clear, specific promise in the title."
+        return 200, {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+
+def start_server(behaviours):
+    """Serves the fake APIs on a free local port in a daemon thread; returns ``(server, base_url)``."""
+    handler = type("BenchHandler", (FakeAPIHandler,), {"behaviours": behaviours})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    # Uploaded files and batches, for the Batch API routes
+    server.files, server.batches, server.ids = {}, {}, itertools.count(1)
+    threading.Thread(target=server.serve_forever, name="fake-apis", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class FakeTranscriptApi:
+    """Drop-in for ``YouTubeTranscriptApi`` that fetches from the fake server."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    def fetch(self, video_id, languages=("en",)):
+        response = self.session.get(f"{self.base_url}/transcripts/{video_id}", timeout=30)
+        if response.status_code == 404:
+            raise TranscriptsDisabled(video_id)
+        response.raise_for_status()
+        data = response.json()
+        return FetchedTranscript(
+            snippets=[FetchedTranscriptSnippet(text=data["text"], start=0.0, duration=0.0)],
+            video_id=video_id,
+            language=data["language_code"],
+            language_code=data["language_code"],
+            is_generated=False,
+        )
@@ -0,0 +1,124 @@
+# benchmarks/load.py
+"""
+Load-tests the API under gunicorn once per DB_CONN_MAX_AGE value, to show
+what opening a database connection per request costs.
+
+    python benchmarks/load.py --conn-max-age 0 60 --concurrency 8 --requests 1000
+
+Uses the project settings, so point POSTGRES_* at a database first. The
+default target, /readyz, does nothing but a ``SELECT 1``, which leaves
+connection setup as the main difference between the runs. Pass --path to
+load a real endpoint instead (e.g. /api/videos/).
+"""
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONNECTIONS_METRIC = re.compile(r'^youtube_insights_db_connections_total\{alias="default"\} (\d+)', re.MULTILINE)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(port, conn_max_age, workers, threads):
+    env = {
+        **os.environ,
+        "DB_CONN_MAX_AGE": str(conn_max_age),
+        "WEB_CONCURRENCY": str(workers),
+        "GUNICORN_THREADS": str(threads),
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "GUNICORN_LOG_LEVEL": "warning",
+        "ALLOWED_HOSTS": "127.0.0.1",
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", "/dev/null", "Youtube_insights.wsgi"],
+        cwd=ROOT, env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/healthz", timeout=1).ok:
+                return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not come up within 30s")
+
+
+def connections_opened(base_url):
+    """Connections opened by whichever worker answers; exact with --workers 1."""
+    text = requests.get(f"{base_url}/metrics", timeout=5).text
+    match = CONNECTIONS_METRIC.search(text)
+    return int(match.group(1)) if match else 0
+
+
+def run_load(base_url, path, concurrency, total):
+    local = threading.local()
+
+    def one(_):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        response = session.get(f"{base_url}{path}", timeout=30)
+        return time.perf_counter() - start, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    ms = np.array([seconds for seconds, _ in samples]) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "rps": total / elapsed,
+        "errors": sum(code != 200 for _, code in samples),
+        "p50": p50, "p95": p95, "p99": p99, "max": ms.max(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conn-max-age", type=int, nargs="+", default=[0, 60])
+    parser.add_argument("--path", default="/readyz")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=50, help="Requests sent before measuring.")
+    args = parser.parse_args()
+
+    for conn_max_age in args.conn_max_age:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        process = start_gunicorn(port, conn_max_age, args.workers, args.threads)
+        try:
+            run_load(base_url, args.path, args.concurrency, args.warmup)
+            before = connections_opened(base_url)
+            stats = run_load(base_url, args.path, args.concurrency, args.requests)
+            opened = connections_opened(base_url) - before
+        finally:
+            process.terminate()
+            process.wait()
+        print(
+            f"CONN_MAX_AGE={conn_max_age:<5} rps={stats['rps']:<8.1f} errors={stats['errors']:<4} "
+            f"p50={stats['p50']:.1f}ms p95={stats['p95']:.1f}ms p99={stats['p99']:.1f}ms max={stats['max']:.1f}ms "
+            f"connections opened={opened}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# benchmarks/run.py
+"""
+Drives the search endpoint against local fake APIs and reports per-stage latency.
+
+    python benchmarks/run.py --max-results 10 50 --concurrency 1 4 --requests 20
+
+Results are written as JSON under benchmarks/results/ (see compare.py).
+"""
+import argparse
+import functools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_servers import FakeTranscriptApi, scaled_behaviours, start_server  # noqa: E402
+
+SEARCH_PATH = "/api/videos/search/"
+
+
+class StageRecorder:
+    """Collects wall-clock durations per pipeline stage from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.samples = defaultdict(list)
+
+    def timed(self, stage, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage if isinstance(stage, str) else stage(*args, **kwargs), time.perf_counter() - start)
+        return wrapper
+
+    def summary(self):
+        stats = {}
+        for stage, samples in sorted(self.samples.items()):
+            ms = np.array(samples) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            stats[stage] = {
+                "count": len(ms),
+                "mean_ms": round(float(ms.mean()), 1),
+                "p50_ms": round(float(p50), 1),
+                "p95_ms": round(float(p95), 1),
+                "p99_ms": round(float(p99), 1),
+            }
+        return stats
+
+
+def instrument(recorder):
+    """Wraps the client calls that make up a search so each stage is timed."""
+    from api.openai_client import OpenAIClient
+    from api.youtube_client import YouTubeClient
+
+    YouTubeClient._execute = recorder.timed(lambda self, request, call_type: call_type, YouTubeClient._execute)
+    YouTubeClient.fetch_transcript = recorder.timed("transcript", YouTubeClient.fetch_transcript)
+    OpenAIClient.generate_insight = recorder.timed("llm", OpenAIClient.generate_insight)
+    OpenAIClient.generate_insights_batch = recorder.timed("llm_batch", OpenAIClient.generate_insights_batch)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_level(recorder, max_results, concurrency, requests, label):
+    from django.test import Client
+
+    recorder.reset()
+    errors = 0
+    local = threading.local()
+
+    def one(i):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = Client()
+        start = time.perf_counter()
+        # A fresh query per request so nothing is served from the insight cache.
+        response = client.get(SEARCH_PATH, {"q": f"bench {label} {max_results} {concurrency} {i}", "max_results": max_results})
+        recorder.record("request", time.perf_counter() - start)
+        return response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        statuses = list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+    errors = sum(code != 200 for code in statuses)
+
+    return {
+        "max_results": max_results,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 3),
+        "stages": recorder.summary(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-results", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--requests", type=int, default=10, help="Requests per (max_results, concurrency) level.")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiplies every fake API latency.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability that a fake API call fails.")
+    parser.add_argument("--out", default=os.path.join(ROOT, "benchmarks", "results"))
+    args = parser.parse_args()
+
+    _, base_url = start_server(scaled_behaviours(args.latency_scale, args.failure_rate))
+    os.environ.update({
+        "DJANGO_SETTINGS_MODULE": "benchmarks.settings",
+        "YOUTUBE_API_ENDPOINT": base_url,
+        "YOUTUBE_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{base_url}/v1",
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_MAX_RETRIES": "0",
+    })
+
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.core.management import call_command
+
+    from api import clients
+
+    if os.path.exists(settings.DATABASES["default"]["NAME"]):
+        os.remove(settings.DATABASES["default"]["NAME"])
+    call_command("migrate", run_syncdb=True, verbosity=0)
+    clients._instances["transcripts"] = FakeTranscriptApi(base_url)
+
+    recorder = StageRecorder()
+    instrument(recorder)
+
+    commit = git_commit()
+    label = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    runs = []
+    for max_results in args.max_results:
+        for concurrency in args.concurrency:
+            result = run_level(recorder, max_results, concurrency, args.requests, label)
+            runs.append(result)
+            request = result["stages"].get("request", {})
+            print(
+                f"max_results={max_results:<4} concurrency={concurrency:<3} errors={result['errors']:<3} "
+                f"rps={result['throughput_rps']:<7} request p50={request.get('p50_ms')}ms "
+                f"p95={request.get('p95_ms')}ms p99={request.get('p99_ms')}ms"
+            )
+            for stage, stats in result["stages"].items():
+                if stage != "request":
+                    print(f"    {stage:<14} n={stats['count']:<5} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms")
+
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"{label}_{commit}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit,
+            "created_at": label,
+            "config": {
+                "latency_scale": args.latency_scale,
+                "failure_rate": args.failure_rate,
+                "requests": args.requests,
+            },
+            "runs": runs,
+        }, f, indent=2)
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# benchmarks/settings.py
+# Project settings with a throwaway SQLite database, no search cache and no
+# quota limits, so every benchmark request runs the whole pipeline. Also runs
+# the test suite without Postgres:
+#   python manage.py test --settings=benchmarks.settings
+import tempfile
+
+from Youtube_insights.settings import *  # noqa: F401,F403
+from Youtube_insights.settings import SEARCH_CACHE_ALIAS, SECRET_KEY
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(tempfile.gettempdir(), 'youtube_insights_bench.sqlite3'),  # noqa: F405
+        'OPTIONS': {'timeout': 60},
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),  # noqa: F405
+        'CONN_HEALTH_CHECKS': True,
+        # A file rather than SQLite's in-memory default, so the tests' search
+        # job worker processes can open it too
+        'TEST': {'NAME': os.path.join(tempfile.gettempdir(), 'youtube_insights_test.sqlite3')},  # noqa: F405
+    },
+}
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    SEARCH_CACHE_ALIAS: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+SECRET_KEY = SECRET_KEY or 'benchmark-only-secret-key'
+ALLOWED_HOSTS = ['*']
+YOUTUBE_DAILY_QUOTA = 10 ** 9
+YOUTUBE_QUOTA_BUCKET_CAPACITY = 10 ** 9
+PREWARM_CLIENTS = False
+# SQLite cannot enforce QuotaUsage's NULL-user uniqueness; QuotaScheduler.flush copes without it.
+SILENCED_SYSTEM_CHECKS = ['models.W047']
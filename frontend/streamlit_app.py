@@ -1,16 +1,110 @@
 # streamlit_app.py
+import io
+import json
+import os
+import time
+
 import streamlit as st
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
 
-API_URL = "http://api:8000"
+API_URL = os.getenv("API_URL", "http://api:8000")
 SEARCH_URL = f"{API_URL}/api/videos/search/"
 LOGIN_URL = f"{API_URL}/api/users/login/"
 REGISTER_URL = f"{API_URL}/api/users/register/"
 LOGOUT_URL = f"{API_URL}/api/users/logout/"
 
+# (connect, read) timeouts in seconds; an uncached search can take minutes
+TIMEOUT = (5, 30)
+SEARCH_TIMEOUT = (5, 600)
+# Finished searches are reused for identical parameters for this long (seconds)
+RESULT_CACHE_TTL = 10 * 60
+PENDING = "⏳ Generating..."
+PAGE_SIZES = [25, 50, 100, 250]
+EXPORT_FORMATS = {
+    "CSV": ("youtube_insights.csv", "text/csv"),
+    "Parquet": ("youtube_insights.parquet", "application/vnd.apache.parquet"),
+}
+
 st.set_page_config(page_title="YouTube Insights", layout="wide")
 
+
+@st.cache_resource
+def http_session():
+    """One keep-alive session for every call to the API, shared by all reruns and users."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def auth_headers():
+    return {"Authorization": f"Bearer {st.session_state.access}"} if st.session_state.access else {}
+
+
+@st.cache_data(ttl=RESULT_CACHE_TTL, max_entries=32, show_spinner=False)
+def search_results(params, _headers):
+    """
+    Streams a search, showing rows as their insights arrive, and returns the
+    finished rows. Cached per set of query parameters (``_headers`` is not
+    part of the key).
+
+    Streamlit replays every element a cached function draws on each cache
+    hit, so the progress display is redrawn at most once a second.
+    """
+    status_line = st.empty()
+    table = st.empty()
+    status_line.info("🔎 Ranking videos...")
+    rows = []
+    last_update = 0.0
+    try:
+        with http_session().get(SEARCH_URL, params={**dict(params), "stream": "ndjson"}, headers=_headers,
+                                stream=True, timeout=SEARCH_TIMEOUT) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                message = json.loads(line)
+                event, data = message["event"], message["data"]
+                if event == "ranked":
+                    rows = [{**row, "insight": PENDING} for row in data["results"]]
+                elif event == "insight":
+                    rows[data["rank"]]["insight"] = data["insight"]
+                elif event == "error":
+                    rows[data["rank"]]["insight"] = None
+                elif event == "done":
+                    break
+
+                if rows and (event == "ranked" or time.monotonic() - last_update > 1):
+                    last_update = time.monotonic()
+                    done = sum(row["insight"] != PENDING for row in rows)
+                    status_line.info(f"🧠 Generating insights: {done}/{len(rows)} done")
+                    table.dataframe(to_display(rows))
+    finally:
+        status_line.empty()
+        table.empty()
+    return [row for row in rows if row["insight"]]
+
+
+def to_display(rows):
+    df = pd.DataFrame(rows)
+    df["video_link"] = "https://www.youtube.com/watch?v=" + df["video_id"]
+    df_display = df[["title", "channel_title", "views", "subs", "score", "insight", "video_link"]]
+    return df_display.rename(columns={"video_link": "🔗 Link"})
+
+
+@st.cache_data(max_entries=8, show_spinner="Preparing file...")
+def export_file(_df, results_key, file_format):
+    """The results as CSV or Parquet bytes; built only when asked for, once per result set and format."""
+    if file_format == "Parquet":
+        buffer = io.BytesIO()
+        _df.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    return _df.to_csv(index=False).encode("utf-8")
+
+
 # 🔒 Hide Streamlit UI elements
 st.markdown("""
     <style>
@@ -34,6 +128,8 @@ if "user_email" not in st.session_state:
     st.session_state.user_email = None
 if "df_display" not in st.session_state:
     st.session_state.df_display = None
+if "results_key" not in st.session_state:
+    st.session_state.results_key = None
 if "Navigation" not in st.session_state:
     st.session_state["Navigation"] = "Login"
 
@@ -61,7 +157,7 @@ if page == "Register":
             "last_name": last_name,
             "password": password,
         }
-        res = requests.post(REGISTER_URL, json=payload)
+        res = http_session().post(REGISTER_URL, json=payload, timeout=TIMEOUT)
         if res.status_code == 201:
             st.toast("✅ Registration successful. Redirecting to login...", icon="✅")
             st.session_state["Navigation"] = "Login"
@@ -79,7 +175,7 @@ elif page == "Login":
 
     if submitted:
         payload = {"email": email, "password": password}
-        res = requests.post(LOGIN_URL, json=payload)
+        res = http_session().post(LOGIN_URL, json=payload, timeout=TIMEOUT)
         if res.status_code == 200:
             data = res.json()
             st.session_state.access = data["token"]["access"]
@@ -95,8 +191,8 @@ elif page == "Login":
 elif page == "Logout":
     st.title("🚪 Logout")
     if st.session_state.refresh:
-        res = requests.post(LOGOUT_URL, json={"refresh": st.session_state.refresh},
-                            headers={"Authorization": f"Bearer {st.session_state.access}"})
+        res = http_session().post(LOGOUT_URL, json={"refresh": st.session_state.refresh},
+                                  headers=auth_headers(), timeout=TIMEOUT)
         if res.status_code in [200, 205]:
             st.toast("✅ Logged out successfully.", icon="🚪")
         else:
@@ -109,6 +205,7 @@ elif page == "Logout":
     st.session_state.refresh = None
     st.session_state.user_email = None
     st.session_state.df_display = None
+    st.session_state.results_key = None
     st.session_state["Navigation"] = "Login"
     st.rerun()
 
@@ -122,44 +219,52 @@ elif page == "Main App":
 
     query = st.text_input("🔍 Search Query", value="ai")
     max_results = st.slider("🎯 Max Results", 5, 50, 20)
-    published_after = st.date_input("📅 Published After (optional)")
+    # Every 50 candidates cost about 100 YouTube quota units of the 10,000 a day; the API caps larger scans.
+    candidates = st.number_input("🧮 Candidates to scan", min_value=max_results, max_value=1000, value=max_results, step=50)
+    published_after = st.date_input("📅 Published After (optional)", value=None)
     category_id = st.text_input("🎞️ Video Category ID (optional)", value="")
 
     if st.button("Search"):
         params = {
             "q": query,
             "max_results": max_results,
+            "candidates": candidates,
         }
         if published_after:
             params["published_after"] = published_after.isoformat() + "T00:00:00Z"
         if category_id:
             params["video_category_id"] = category_id
+        params = tuple(sorted(params.items()))
 
-        with st.spinner("🔎 Fetching results..."):
-            try:
-                response = requests.get(SEARCH_URL, params=params)
-                response.raise_for_status()
-                data = response.json()
-                if not data:
-                    st.warning("⚠️ No results found.")
-                    st.session_state.df_display = None
-                else:
-                    df = pd.DataFrame(data)
-                    required = ["title", "channel_title", "views", "subs", "score", "insight", "video_id"]
-                    if not all(col in df.columns for col in required):
-                        st.error("❌ Some expected fields are missing.")
-                        st.dataframe(df)
-                        st.session_state.df_display = None
-                    else:
-                        df["video_link"] = "https://www.youtube.com/watch?v=" + df["video_id"]
-                        df_display = df[["title", "channel_title", "views", "subs", "score", "insight", "video_link"]]
-                        df_display = df_display.rename(columns={"video_link": "🔗 Link"})
-                        st.session_state.df_display = df_display
-            except requests.exceptions.RequestException as e:
-                st.error(f"❌ Request failed: {e}")
+        try:
+            rows = search_results(params, auth_headers())
+            if not rows:
+                st.warning("⚠️ No results found.")
                 st.session_state.df_display = None
+            else:
+                st.session_state.df_display = to_display(rows)
+            st.session_state.results_key = params
+            st.session_state.page = 1
+        except requests.exceptions.RequestException as e:
+            st.error(f"❌ Request failed: {e}")
+            st.session_state.df_display = None
+
+    df_display = st.session_state.df_display
+    if df_display is not None:
+        # Only the current page is sent to the browser, so reruns stay cheap however many rows there are.
+        size_col, page_col, count_col = st.columns([1, 1, 2])
+        page_size = size_col.selectbox("Rows per page", PAGE_SIZES, index=1)
+        pages = max(1, -(-len(df_display) // page_size))
+        if st.session_state.get("page", 1) > pages:
+            st.session_state.page = pages
+        page = page_col.number_input("Page", min_value=1, max_value=pages, step=1, key="page")
+        start = (page - 1) * page_size
+        count_col.caption(f"Rows {start + 1}–{min(start + page_size, len(df_display))} of {len(df_display)}")
+        st.dataframe(df_display.iloc[start:start + page_size], hide_index=True)
 
-    if st.session_state.df_display is not None:
-        st.dataframe(st.session_state.df_display)
-        csv = st.session_state.df_display.to_csv(index=False).encode("utf-8")
-        st.download_button("📥 Download CSV", csv, "youtube_insights.csv", "text/csv")
+        format_col, export_col = st.columns([1, 3])
+        file_format = format_col.selectbox("Export format", list(EXPORT_FORMATS))
+        if export_col.button("📦 Prepare download"):
+            file_name, mime = EXPORT_FORMATS[file_format]
+            data = export_file(df_display, st.session_state.results_key, file_format)
+            export_col.download_button(f"📥 Download {file_format}", data, file_name, mime, on_click="ignore")
@@ -0,0 +1,39 @@
+# gunicorn.conf.py
+# Production serving: gunicorn -c gunicorn.conf.py Youtube_insights.wsgi
+#
+# Threaded workers, because a search mostly waits on YouTube and OpenAI.
+# Each thread keeps its own persistent database connection (DB_CONN_MAX_AGE),
+# so Postgres sees up to workers * threads connections per container.
+#
+# This is WSGI only: /api/videos/search/async/ still works, but each request
+# runs on its own event loop, so its HTTP clients are built and closed per
+# request instead of pooled. Serve Youtube_insights.asgi (e.g. with uvicorn)
+# if that endpoint carries real traffic.
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+# Uncached searches with many videos can take minutes.
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 300))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+# Recycle workers now and then so slow leaks cannot build up; the jitter keeps
+# them from all restarting at once.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 200))
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_worker_init(worker):
+    """Builds the API clients before the worker takes traffic, so the first requests don't pay for it."""
+    from api.clients import warm_clients
+
+    try:
+        warm_clients()
+    except Exception as e:
+        worker.log.warning(f"Client warm-up failed, building them on first use instead: {e}")